@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for Claude responses, keyed by SHA-256 of the prompt.
+Identical prompts (retries, reposted job offers, polling) are served
+from disk instead of spawning the CLI again. A small in-memory LRU
+fronts the disk files so repeat hits skip the read + JSON decode.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LLMCache:
+    def __init__(self, cache_dir="data/llm_cache", ttl_days=7, hot_size=1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl_days * 86400
+        self.hot_size = hot_size
+        self._hot = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, prompt: str) -> str:
+        return hashlib.sha256(prompt.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _hot_get(self, key: str):
+        with self._lock:
+            response = self._hot.get(key)
+            if response is not None:
+                self._hot.move_to_end(key)
+            return response
+
+    def _hot_set(self, key: str, response: str):
+        with self._lock:
+            self._hot[key] = response
+            self._hot.move_to_end(key)
+            while len(self._hot) > self.hot_size:
+                self._hot.popitem(last=False)
+
+    def get(self, prompt: str):
+        """Return the cached response for this prompt, or None if absent/expired."""
+        key = self._key(prompt)
+
+        response = self._hot_get(key)
+        if response is not None:
+            return response
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entry.get("ts", 0) > self.ttl:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+
+        response = entry.get("response")
+        if response is not None:
+            self._hot_set(key, response)
+        return response
+
+    def set(self, prompt: str, response: str):
+        key = self._key(prompt)
+        self._hot_set(key, response)
+
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"response": response, "ts": time.time()}, f)
+            os.replace(tmp_path, path)  # atomic, no partial reads
+        except OSError as e:
+            print(f"LLMCache write failed: {e}")
@@ -1,144 +1,224 @@
 #!/usr/bin/env python3
 """
-Simple HTTP wrapper for Claude Code CLI.
-Exposes claude -p as HTTP endpoints.
+HTTP wrapper for Claude Code CLI.
+Exposes claude -p as HTTP endpoints on an asyncio stack (FastAPI + uvicorn),
+so slow Claude calls no longer block /health and other in-flight requests.
 """
 
+import asyncio
+import hashlib
 import json
+import multiprocessing
+import re
+import resource
 import subprocess
+import sys
+import threading
 import os
+import queue
 import base64
+import functools
 import tempfile
-from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse
 import traceback
+from collections import OrderedDict
+from html import escape as _html_escape
+from io import BytesIO
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+import uvicorn
+
+# C event loop + C HTTP parser when available; pure-Python fallbacks otherwise
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+try:
+    import httptools  # noqa: F401 - presence check for uvicorn's http option
+    HTTP_IMPL = "httptools"
+except ImportError:
+    HTTP_IMPL = "auto"
+
+# orjson serializes straight to bytes, ~3-5x faster than stdlib json on the
+# multi-KB /generate-cv payloads; fall back to stdlib when unavailable
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    orjson = None
+    DefaultResponse = JSONResponse
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from llm_cache import LLMCache
+
+# Direct Anthropic API path (enables prompt caching) - CLI stays the fallback
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# SIMD base64 (SSSE3/AVX2) when available - drop-in for the stdlib module,
+# 3-10x faster on the multi-hundred-KB PDF payloads
+try:
+    import pybase64 as _b64
+except ImportError:
+    _b64 = base64
 
-# PDF extraction - try multiple libraries
+# PDF extraction - try multiple libraries. PyMuPDF (fitz) is preferred: its
+# C extractor is an order of magnitude faster than pdfplumber's pure-Python
+# parsing and opens documents straight from bytes.
 PDF_EXTRACTOR = None
 try:
-    import pdfplumber
-    PDF_EXTRACTOR = "pdfplumber"
+    import fitz  # PyMuPDF
+    PDF_EXTRACTOR = "pymupdf"
 except ImportError:
     try:
-        import PyPDF2
-        PDF_EXTRACTOR = "pypdf2"
+        import pdfplumber
+        PDF_EXTRACTOR = "pdfplumber"
     except ImportError:
-        print("Warning: No PDF library available. Install pdfplumber or PyPDF2 for PDF extraction.")
+        try:
+            import PyPDF2
+            PDF_EXTRACTOR = "pypdf2"
+        except ImportError:
+            print("Warning: No PDF library available. Install pymupdf, pdfplumber or PyPDF2 for PDF extraction.")
 
 # PDF generation
 PDF_GENERATOR = None
 try:
     from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
-    from reportlab.lib.enums import TA_LEFT, TA_CENTER
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import cm, mm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+    from reportlab.lib.enums import TA_LEFT, TA_RIGHT
     from reportlab.lib.colors import HexColor
     PDF_GENERATOR = "reportlab"
+    # Shared CV table layout - TableStyle parses its command list at
+    # construction and is read-only when applied, so build these once
+    _ENTRY_COLWIDTHS = [13 * cm, 4 * cm]
+    _SKILL_COLWIDTHS = [4 * cm, 13 * cm]
+    _ENTRY_TABLE_STYLE = TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+    ])
+    _SKILL_TABLE_STYLE = TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ])
 except ImportError:
     print("Warning: reportlab not available. Install reportlab for PDF generation.")
 
 PORT = int(os.environ.get("PORT", 8080))
+# How long an idle client connection is kept open for reuse. The bot calls
+# several endpoints back-to-back per job, so reusing the TCP connection
+# avoids a handshake per call.
+KEEP_ALIVE_TIMEOUT = int(os.environ.get("KEEP_ALIVE_TIMEOUT", 75))
+# Number of long-lived claude workers. 0 falls back to one subprocess per request.
+CLAUDE_POOL_SIZE = int(os.environ.get("CLAUDE_POOL_SIZE", 4))
+# Bounded pool for blocking work (PDF parsing/rendering, LaTeX compilation)
+EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get("CLAUDE_WORKERS", 10)))
+
+# Per-request log lines go through a bounded queue drained by a daemon
+# thread, so handlers never block on a stdout write syscall. Batches are
+# flushed together; if the queue is full the line is dropped rather than
+# stalling the request.
+_LOG_QUEUE = queue.Queue(maxsize=10000)
+
+
+def _log(message: str):
+    try:
+        _LOG_QUEUE.put_nowait(message)
+    except queue.Full:
+        pass
 
-class ClaudeHandler(BaseHTTPRequestHandler):
-    def _set_headers(self, status=200, content_type="application/json"):
-        self.send_response(status)
-        self.send_header("Content-Type", content_type)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.end_headers()
 
-    def _send_json(self, data, status=200):
-        self._set_headers(status)
-        self.wfile.write(json.dumps(data).encode())
+def _log_drain():
+    while True:
+        lines = [_LOG_QUEUE.get()]
+        try:
+            while len(lines) < 100:
+                lines.append(_LOG_QUEUE.get_nowait())
+        except queue.Empty:
+            pass
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
-    def _send_error(self, message, status=500):
-        self._send_json({"error": message}, status)
 
-    def do_OPTIONS(self):
-        self._set_headers(200)
+threading.Thread(target=_log_drain, daemon=True).start()
 
-    def do_GET(self):
-        path = urlparse(self.path).path
+ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
+ANTHROPIC_MODEL = os.environ.get("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
 
-        if path == "/health":
-            self._send_json({"status": "ok", "service": "claude-server"})
-        else:
-            self._send_error("Not found", 404)
+# Scoped workspace for claude subprocesses. Running from a minimal project
+# directory with only project/local settings keeps user-level CLAUDE.md,
+# plugins and MCP tool descriptions out of every turn, which is pure prompt
+# overhead for this proxy workload.
+CLAUDE_WORKSPACE = Path(os.environ.get(
+    "CLAUDE_WORKSPACE",
+    os.path.join(os.environ.get("HOME", "/tmp"), ".claude-server", "workspace"),
+))
+CLAUDE_SETTING_SOURCES = os.environ.get("CLAUDE_SETTING_SOURCES", "project,local")
 
-    def do_POST(self):
-        path = urlparse(self.path).path
 
-        try:
-            content_length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(content_length).decode("utf-8")
-            data = json.loads(body) if body else {}
-        except json.JSONDecodeError as e:
-            self._send_error(f"Invalid JSON: {e}", 400)
-            return
+def _init_claude_workspace():
+    git_dir = CLAUDE_WORKSPACE / ".git"
+    git_dir.mkdir(parents=True, exist_ok=True)
+    head = git_dir / "HEAD"
+    if not head.exists():
+        # A fake repo root stops the CLI from walking up for project context
+        head.write_text("ref: refs/heads/main\n")
 
-        try:
-            if path == "/prompt":
-                result = self.handle_prompt(data)
-            elif path == "/synthesize":
-                result = self.handle_synthesize(data)
-            elif path == "/match-skills":
-                result = self.handle_match_skills(data)
-            elif path == "/salary-analysis":
-                result = self.handle_salary_analysis(data)
-            elif path == "/generate-cv":
-                result = self.handle_generate_cv(data)
-            elif path == "/extract-pdf":
-                result = self.handle_extract_pdf(data)
-            elif path == "/generate-pdf":
-                result = self.handle_generate_pdf(data)
-            else:
-                self._send_error("Not found", 404)
-                return
 
-            self._send_json(result)
+_init_claude_workspace()
 
-        except Exception as e:
-            traceback.print_exc()
-            self._send_error(str(e), 500)
 
-    def run_claude(self, prompt: str, timeout: int = 120) -> str:
-        """Execute claude -p with the given prompt."""
-        try:
-            result = subprocess.run(
-                ["claude", "-p", prompt],
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
+# Only what the CLI needs crosses into the child: a lean env shrinks each
+# spawn and keeps unrelated secrets out of Claude processes.
+ENV_WHITELIST = {
+    "PATH", "HOME", "USER", "SHELL", "LANG", "LC_ALL", "TMPDIR",
+    "CLAUDE_CONFIG_DIR", "ANTHROPIC_API_KEY",
+}
+# Per-process address-space cap; 0 disables the limit
+CLAUDE_MEM_LIMIT = int(os.environ.get("CLAUDE_MEM_LIMIT_GB", 4)) * 1024 ** 3
 
-            if result.returncode != 0 and result.stderr:
-                print(f"Claude stderr: {result.stderr}")
 
-            return result.stdout.strip()
-        except subprocess.TimeoutExpired:
-            raise Exception(f"Claude timeout after {timeout}s")
-        except Exception as e:
-            raise Exception(f"Claude error: {e}")
+def claude_env() -> dict:
+    return {k: os.environ[k] for k in ENV_WHITELIST if k in os.environ}
 
-    def handle_prompt(self, data: dict) -> dict:
-        """Generic prompt endpoint."""
-        prompt = data.get("prompt", "")
-        if not prompt:
-            raise ValueError("Missing 'prompt' field")
 
-        response = self.run_claude(prompt)
-        return {"response": response}
+def _limit_claude_memory():
+    resource.setrlimit(resource.RLIMIT_AS, (CLAUDE_MEM_LIMIT, CLAUDE_MEM_LIMIT))
 
-    def handle_synthesize(self, data: dict) -> dict:
-        """Synthesize a job offer."""
-        job_description = data.get("job_description", "")
-        if not job_description:
-            raise ValueError("Missing 'job_description' field")
 
-        prompt = f'''Analyse cette offre d'emploi et retourne UNIQUEMENT un JSON valide:
-{{
+def claude_preexec():
+    return _limit_claude_memory if CLAUDE_MEM_LIMIT > 0 else None
+
+
+def claude_argv(*extra) -> list:
+    """argv for a claude spawn, with settings scoped to the workspace."""
+    argv = ["claude", "-p"]
+    if CLAUDE_SETTING_SOURCES:
+        argv += ["--setting-sources", CLAUDE_SETTING_SOURCES]
+    argv += extra
+    return argv
+
+
+llm_cache = LLMCache(
+    cache_dir=os.environ.get("LLM_CACHE_DIR", "data/llm_cache"),
+    ttl_days=int(os.environ.get("LLM_CACHE_TTL_DAYS", 7)),
+)
+
+# Static instruction/schema blocks shared by every call to an endpoint.
+# Keeping them separate from the per-request suffix makes them cacheable
+# (cache_control: ephemeral) when going through the Anthropic API.
+SYNTH_SYSTEM = '''Analyse cette offre d'emploi et retourne UNIQUEMENT un JSON valide:
+{
     "title": "titre du poste",
     "company": "nom de l'entreprise ou Non spécifié",
     "location": "lieu ou Non spécifié",
@@ -148,44 +228,19 @@ class ClaudeHandler(BaseHTTPRequestHandler):
     "benefits": ["avantage1"],
     "salary_range": null,
     "summary": "résumé en 2-3 phrases"
-}}
+}'''
 
-Offre:
-{job_description}'''
-
-        response = self.run_claude(prompt)
-        return self.extract_json(response)
-
-    def handle_match_skills(self, data: dict) -> dict:
-        """Match CV skills with job requirements."""
-        job_description = data.get("job_description", "")
-        cv_content = data.get("cv_content", "CV non fourni")
-
-        prompt = f'''Compare ce CV avec cette offre et retourne UNIQUEMENT un JSON valide:
-{{
+MATCH_SYSTEM = '''Compare ce CV avec cette offre et retourne UNIQUEMENT un JSON valide:
+{
     "match_score": 75,
-    "matched_skills": [{{"skill": "Python", "cv_level": "3 ans", "required": "2 ans", "match": true}}],
-    "missing_skills": [{{"skill": "Kubernetes", "importance": "nice-to-have"}}],
+    "matched_skills": [{"skill": "Python", "cv_level": "3 ans", "required": "2 ans", "match": true}],
+    "missing_skills": [{"skill": "Kubernetes", "importance": "nice-to-have"}],
     "highlights": ["point fort 1"],
     "recommendations": ["recommandation 1"]
-}}
-
-CV:
-{cv_content}
-
-Offre:
-{job_description}'''
-
-        response = self.run_claude(prompt)
-        return self.extract_json(response)
+}'''
 
-    def handle_salary_analysis(self, data: dict) -> dict:
-        """Analyze salary for a job."""
-        job_description = data.get("job_description", "")
-        location = data.get("location", "France")
-
-        prompt = f'''Analyse le salaire pour cette offre et retourne UNIQUEMENT un JSON valide:
-{{
+SALARY_SYSTEM = '''Analyse le salaire pour cette offre et retourne UNIQUEMENT un JSON valide:
+{
     "offered_min": null,
     "offered_max": null,
     "market_low": 45000,
@@ -194,127 +249,13 @@ Offre:
     "currency": "EUR",
     "analysis": "Analyse du positionnement salarial",
     "negotiation_tips": ["conseil 1"]
-}}
-
-Offre:
-{job_description}
-
-Localisation: {location}'''
-
-        response = self.run_claude(prompt)
-        return self.extract_json(response)
-
-    def handle_generate_cv(self, data: dict) -> dict:
-        """Generate a tailored CV in LaTeX ModernCV format."""
-        cv_content = data.get("cv_content", "")
-        job_title = data.get("job_title", "")
-        company = data.get("company", "")
-        requirements = data.get("requirements", [])
-        highlights = data.get("highlights", [])
-        fit_level = data.get("fit_level", 1)  # 1=standard, 2=modéré, 3=laxiste
-        language = data.get("language", "fr")  # fr, en, es, de, etc.
-
-        # Mapping des langues
-        language_config = {
-            "fr": {
-                "name": "français",
-                "sections": {
-                    "profile": "Profil",
-                    "skills": "Compétences clés",
-                    "experience": "Expérience professionnelle",
-                    "education": "Formation",
-                    "interests": "Centres d'intérêt"
-                }
-            },
-            "en": {
-                "name": "English",
-                "sections": {
-                    "profile": "Profile",
-                    "skills": "Key Skills",
-                    "experience": "Professional Experience",
-                    "education": "Education",
-                    "interests": "Interests"
-                }
-            },
-            "es": {
-                "name": "español",
-                "sections": {
-                    "profile": "Perfil",
-                    "skills": "Competencias clave",
-                    "experience": "Experiencia profesional",
-                    "education": "Formación",
-                    "interests": "Intereses"
-                }
-            },
-            "de": {
-                "name": "Deutsch",
-                "sections": {
-                    "profile": "Profil",
-                    "skills": "Kernkompetenzen",
-                    "experience": "Berufserfahrung",
-                    "education": "Ausbildung",
-                    "interests": "Interessen"
-                }
-            }
-        }
-
-        lang_cfg = language_config.get(language, language_config["fr"])
-
-        # Configuration du niveau d'adaptation (fit)
-        fit_config = {
-            1: {
-                "name": "Standard",
-                "description": "Adaptation légère - garde le CV proche de l'original",
-                "instructions": """NIVEAU STANDARD (conservateur):
-- Reformule légèrement les tâches pour utiliser le vocabulaire de l'offre
-- Garde la structure et le contenu très proches de l'original
-- Ne modifie que les formulations mineures
-- Priorise les expériences pertinentes mais garde toutes les tâches principales"""
-            },
-            2: {
-                "name": "Modéré",
-                "description": "Adaptation modérée - reformule activement pour matcher",
-                "instructions": """NIVEAU MODÉRÉ (équilibré):
-- Reformule activement les tâches pour matcher les compétences demandées
-- Transpose les compétences transférables vers le domaine cible
-- Réorganise les bullets pour mettre en avant les plus pertinentes
-- Peut omettre les tâches peu pertinentes pour gagner de la place
-- Ajoute des métriques et contexte quand c'est honnêtement applicable"""
-            },
-            3: {
-                "name": "Laxiste",
-                "description": "Adaptation maximale - reformulation créative tout en restant honnête",
-                "instructions": """NIVEAU LAXISTE (créatif):
-- Reformulation créative et poussée des tâches
-- Transpose agressivement les compétences vers le nouveau domaine
-- Reformule complètement les bullets pour coller au maximum à l'offre
-- Mets en avant les aspects les plus pertinents même si mineurs dans l'original
-- Utilise le vocabulaire exact de l'offre autant que possible
-- Peut fusionner ou réinterpréter des expériences pour plus de pertinence
-- Reste HONNÊTE: ne jamais inventer d'expériences ou compétences inexistantes"""
-            }
-        }
-
-        fit_cfg = fit_config.get(fit_level, fit_config[1])
-
-        prompt = f'''Analyse ce CV et génère une version adaptée au poste visé.
-
-CV SOURCE:
-{cv_content}
-
-POSTE VISÉ: {job_title}
-ENTREPRISE: {company}
-COMPÉTENCES DEMANDÉES: {", ".join(requirements[:8]) if requirements else "Non spécifiées"}
-POINTS FORTS IDENTIFIÉS: {", ".join(highlights[:5]) if highlights else "À identifier"}
-
-LANGUE DE SORTIE: {lang_cfg["name"]} (tout le contenu du CV doit être dans cette langue)
-NIVEAU D'ADAPTATION: {fit_cfg["name"]} - {fit_cfg["description"]}
+}'''
 
-{fit_cfg["instructions"]}
+CV_SYSTEM = '''Analyse le CV fourni et génère une version adaptée au poste visé.
 
 Retourne UNIQUEMENT un JSON valide avec cette structure exacte:
-{{
-    "personal": {{
+{
+    "personal": {
         "firstname": "Prénom",
         "lastname": "NOM",
         "title": "Titre professionnel adapté au poste -- Domaine",
@@ -324,16 +265,16 @@ Retourne UNIQUEMENT un JSON valide avec cette structure exacte:
         "email": "email@example.com",
         "github": "username ou null",
         "linkedin": "username ou null"
-    }},
+    },
     "profile": "Paragraphe de 3-4 phrases décrivant le profil adapté au poste. Utiliser **gras** pour les mots-clés importants.",
     "skills": [
-        {{"category": "Langages", "items": "C, C++, Python, Rust"}},
-        {{"category": "Systèmes", "items": "Linux embarqué, RTOS, temps réel"}},
-        {{"category": "Outils", "items": "Git, CMake, Docker, CI/CD"}},
-        {{"category": "Langues", "items": "Français (natif), Anglais (C1)"}}
+        {"category": "Langages", "items": "C, C++, Python, Rust"},
+        {"category": "Systèmes", "items": "Linux embarqué, RTOS, temps réel"},
+        {"category": "Outils", "items": "Git, CMake, Docker, CI/CD"},
+        {"category": "Langues", "items": "Français (natif), Anglais (C1)"}
     ],
     "experience": [
-        {{
+        {
             "dates": "2023--2025",
             "title": "Titre du poste",
             "company": "Entreprise",
@@ -344,20 +285,20 @@ Retourne UNIQUEMENT un JSON valide avec cette structure exacte:
                 "Accomplissement 2 avec résultats mesurables",
                 "Accomplissement 3 technique pertinent"
             ]
-        }}
+        }
     ],
     "education": [
-        {{
+        {
             "dates": "2020--2025",
             "degree": "Diplôme",
             "school": "École/Université",
             "details": "Spécialisation ou détails"
-        }}
+        }
     ],
     "interests": "Liste des centres d'intérêt pertinents séparés par des virgules",
     "adaptations": ["Modification 1", "Modification 2"],
     "summary": "Résumé des adaptations en 1-2 phrases"
-}}
+}
 
 RÈGLES IMPORTANTES:
 1. Adapte le TITRE au poste visé (ex: "Ingénieur Développement C/C++ -- Aéronautique")
@@ -383,7 +324,7 @@ c) METS EN AVANT les aspects pertinents, MINIMISE ou OMETS les autres
    - Si le poste est technique: développe les détails techniques, technologies, résultats mesurables
 
 d) UTILISE LES MOTS-CLÉS EXACTS de l'offre quand c'est honnêtement applicable
-   - Intègre naturellement les termes: {", ".join(requirements[:5]) if requirements else "de l'offre"}
+   - Intègre naturellement les termes des COMPÉTENCES DEMANDÉES
 
 e) QUANTIFIE et CONTEXTUALISE pour le secteur visé
    - Ajoute des métriques quand possible (%, temps, volume)
@@ -397,186 +338,854 @@ EXEMPLES DE REFORMULATION LATÉRALE:
 
 NE PAS INVENTER d'expériences, mais reformuler honnêtement celles existantes pour maximiser leur pertinence.'''
 
-        response = self.run_claude(prompt, timeout=180)
-        result = self.extract_json(response)
-
-        # Extraire les infos de contact directement du CV source (fiable)
-        # et les injecter dans le JSON pour qu'elles ne soient jamais perdues
-        contact = self._extract_contact_info(cv_content)
-        if contact:
-            personal = result.get("personal", {})
-            if not isinstance(personal, dict):
-                personal = {}
-            for field in ("phone", "email", "github", "linkedin"):
-                if field in contact:
-                    personal[field] = contact[field]
-            result["personal"] = personal
-
-        # Si parsing échoué, retourner le contenu brut
-        if "raw_response" in result:
-            return {
-                "latex_content": "",
-                "cv_text": result.get("raw_response", ""),
-                "adaptations": ["CV généré (format brut)"],
-                "summary": "Le CV a été généré mais le parsing JSON a échoué."
-            }
+app = FastAPI(title="claude-server", default_response_class=DefaultResponse)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+# LaTeX/base64 payloads compress well; small bodies aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
-        # Générer le LaTeX ModernCV
-        try:
-            latex_content = self._build_moderncv_latex(result)
-            cv_text = self._build_cv_text(result)
 
-            return {
-                "latex_content": latex_content,
-                "cv_text": cv_text,
-                "adaptations": result.get("adaptations", []),
-                "summary": result.get("summary", "CV adapté généré avec succès.")
-            }
-        except Exception as e:
-            print(f"Error building LaTeX: {e}")
-            traceback.print_exc()
-            return {
-                "latex_content": "",
-                "cv_text": str(result),
-                "adaptations": ["Erreur lors de la génération LaTeX"],
-                "summary": f"Erreur: {str(e)}"
-            }
+@app.on_event("startup")
+async def set_default_executor():
+    # Anything offloaded without an explicit executor shares the same bound
+    asyncio.get_running_loop().set_default_executor(EXECUTOR)
+
+
+class BadRequest(Exception):
+    """Client error - maps to HTTP 400 with the same {"error": ...} body."""
+    pass
+
+
+class BodyTooLarge(Exception):
+    """Request body over MAX_BODY - maps to HTTP 413."""
+    pass
+
+
+@app.exception_handler(BadRequest)
+async def bad_request_handler(request: Request, exc: BadRequest):
+    return DefaultResponse({"error": str(exc)}, status_code=400)
+
+
+@app.exception_handler(BodyTooLarge)
+async def body_too_large_handler(request: Request, exc: BodyTooLarge):
+    return DefaultResponse({"error": str(exc)}, status_code=413)
+
+
+@app.exception_handler(Exception)
+async def unhandled_error_handler(request: Request, exc: Exception):
+    traceback.print_exc()
+    return DefaultResponse({"error": str(exc)}, status_code=500)
 
-    def _extract_contact_info(self, cv_content: str) -> dict:
-        """Extract contact info from CV source text using regex.
-        Returns only the fields actually found, so missing ones won't override Claude's output."""
-        import re
-        info = {}
 
-        # Phone: +33 7 82 38 16 99 / +33782381699 / 07 82 38 16 99 / etc.
-        phone_match = re.search(
-            r'(\+\d{1,3}[\s\.\-]?\d[\d\s\.\-]{6,17}\d|\b0\d[\s\.\-]?\d{2}[\s\.\-]?\d{2}[\s\.\-]?\d{2}[\s\.\-]?\d{2}\b)',
-            cv_content
+# Hard cap on request bodies; PDFs arrive base64-encoded so leave headroom
+MAX_BODY = int(os.environ.get("MAX_BODY_BYTES", 32 * 1024 * 1024))
+
+
+async def read_json_body(request: Request) -> dict:
+    """Read and parse the POST body, keeping the old {"error": ...} contract on bad JSON.
+
+    The declared Content-Length is checked before reading so oversized
+    bodies are rejected without buffering or decoding them."""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_BODY:
+        raise BodyTooLarge(f"Body too large (max {MAX_BODY} bytes)")
+
+    body = await request.body()
+    if len(body) > MAX_BODY:
+        raise BodyTooLarge(f"Body too large (max {MAX_BODY} bytes)")
+    if not body:
+        return {}
+    try:
+        return _loads(body)  # orjson parses bytes directly, no decode step
+    except ValueError as e:
+        raise BadRequest(f"Invalid JSON: {e}")
+
+
+async def terminate_process(proc, grace: float = 2.0):
+    """SIGTERM, give the process a moment to exit cleanly, then SIGKILL."""
+    proc.terminate()
+    try:
+        await asyncio.wait_for(proc.wait(), grace)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+
+
+class ClaudeWorker:
+    """Long-lived claude process speaking the stream-json protocol.
+
+    Keeping the process warm avoids paying CLI startup and config loading
+    on every request."""
+
+    def __init__(self):
+        self.proc = None
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            *claude_argv("--input-format", "stream-json",
+                         "--output-format", "stream-json",
+                         "--verbose"),
+            cwd=str(CLAUDE_WORKSPACE),
+            env=claude_env(),
+            preexec_fn=claude_preexec(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
         )
-        if phone_match:
-            info['phone'] = phone_match.group(1).strip()
-
-        # Email
-        email_match = re.search(r'[\w\.\-\+]+@[\w\.\-]+\.[a-zA-Z]{2,}', cv_content)
-        if email_match:
-            info['email'] = email_match.group(0)
-
-        # GitHub: github.com/username or "github: username" or "github username"
-        github_match = re.search(
-            r'github\.com/([a-zA-Z0-9_\-]+)|github[:\s]+([a-zA-Z0-9_\-]{2,})',
-            cv_content, re.IGNORECASE
+
+    async def stop(self):
+        if self.alive():
+            await terminate_process(self.proc)
+        self.proc = None
+
+    async def run(self, prompt: str, timeout: int) -> str:
+        """Send one prompt and read events until the end-of-response marker."""
+        message = json.dumps({
+            "type": "user",
+            "message": {"role": "user", "content": [{"type": "text", "text": prompt}]}
+        })
+        self.proc.stdin.write(message.encode() + b"\n")
+        await self.proc.stdin.drain()
+
+        async def read_result():
+            while True:
+                line = await self.proc.stdout.readline()
+                if not line:
+                    raise Exception("Claude worker closed its stdout")
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if event.get("type") == "result":
+                    return (event.get("result") or "").strip()
+
+        return await asyncio.wait_for(read_result(), timeout)
+
+
+class ClaudeProcessPool:
+    """Bounded pool of single-use ClaudeWorker processes.
+
+    A stream-json process holds one conversation, so serving a second
+    prompt from the same worker would leak earlier users' CVs and offers
+    into its context and grow the per-turn input. Each worker therefore
+    answers exactly one prompt and is then replaced; the replacement warms
+    up in the background so requests still skip the CLI cold start."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._queue = None
+        # Strong refs to respawn tasks (the loop only keeps weak ones)
+        self._respawn_tasks = set()
+
+    def _ensure_queue(self):
+        # Lazy init so the queue binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            for _ in range(self.size):
+                self._queue.put_nowait(ClaudeWorker())
+        return self._queue
+
+    async def run(self, prompt: str, timeout: int) -> str:
+        queue = self._ensure_queue()
+        worker = await queue.get()
+        try:
+            if not worker.alive():
+                await worker.start()
+            return await worker.run(prompt, timeout)
+        except asyncio.TimeoutError:
+            raise Exception(f"Claude timeout after {timeout}s")
+        except Exception:
+            # Worker is in an unknown state: fall back to a cold one-shot
+            return await run_claude_once(prompt, timeout)
+        finally:
+            task = asyncio.create_task(self._respawn(worker))
+            self._respawn_tasks.add(task)
+            task.add_done_callback(self._respawn_tasks.discard)
+
+    async def _respawn(self, worker):
+        """Retire a used worker and put a fresh, pre-started one in its place."""
+        await worker.stop()
+        fresh = ClaudeWorker()
+        try:
+            await fresh.start()
+        except Exception:
+            pass  # run() starts dead workers on acquire
+        self._queue.put_nowait(fresh)
+
+
+claude_pool = ClaudeProcessPool(CLAUDE_POOL_SIZE) if CLAUDE_POOL_SIZE > 0 else None
+
+
+async def run_claude_once(prompt: str, timeout: int = 120) -> str:
+    """Execute a one-shot claude -p subprocess (cold start).
+
+    The prompt goes in over stdin rather than argv, so its size is not
+    bounded by ARG_MAX and the bytes are encoded exactly once."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *claude_argv(),
+            cwd=str(CLAUDE_WORKSPACE),
+            env=claude_env(),
+            preexec_fn=claude_preexec(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
-        if github_match:
-            info['github'] = (github_match.group(1) or github_match.group(2)).strip()
+    except Exception as e:
+        raise Exception(f"Claude error: {e}")
+
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            proc.communicate(input=prompt.encode()), timeout)
+    except asyncio.TimeoutError:
+        await terminate_process(proc)
+        raise Exception(f"Claude timeout after {timeout}s")
+
+    if proc.returncode != 0 and stderr:
+        _log(f"Claude stderr: {stderr.decode(errors='replace')}")
+
+    return stdout.decode(errors="replace").strip()
+
+
+async def run_claude_raw(prompt: str, timeout: int) -> str:
+    """Send a fully assembled prompt to the CLI (pooled worker or one-shot)."""
+    if claude_pool is not None:
+        return await claude_pool.run(prompt, timeout)
+    return await run_claude_once(prompt, timeout)
+
+
+BATCH_HEADER = (
+    "Réponds aux tâches indépendantes suivantes. Retourne UNIQUEMENT un tableau JSON "
+    "où l'élément i est la réponse à la tâche i (objet JSON si la tâche en demande un, "
+    "sinon une chaîne)."
+)
+
+
+class PromptBatcher:
+    """Coalesce bursts of concurrent prompts into one Claude invocation.
+
+    A lone request is dispatched immediately (no added latency); only when
+    several prompts are pending at dequeue time are they merged into a single
+    multi-task prompt whose JSON-array answer is demultiplexed back to the
+    waiters. If the array comes back unusable, each prompt is re-run alone."""
+
+    def __init__(self, max_batch: int, max_wait_ms: int):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._drain_task = None
+        # Strong refs to in-flight batch tasks: the loop only keeps weak
+        # ones, so an unreferenced task can be garbage-collected mid-batch
+        # and leave every waiter future unresolved
+        self._tasks = set()
+
+    async def submit(self, prompt: str, timeout: int) -> str:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._drain_task = asyncio.create_task(self._drain())
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((prompt, timeout, fut))
+        return await fut
+
+    async def _drain(self):
+        while True:
+            batch = [await self._queue.get()]
+            if not self._queue.empty():
+                # More work is pending: give the burst a short window to land
+                deadline = asyncio.get_running_loop().time() + self.max_wait
+                while len(batch) < self.max_batch:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            task = asyncio.create_task(self._execute(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, batch):
+        if len(batch) == 1:
+            prompt, timeout, fut = batch[0]
+            try:
+                result = await run_claude_raw(prompt, timeout)
+                if not fut.done():
+                    fut.set_result(result)
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
 
-        # LinkedIn: linkedin.com/in/username or "linkedin: username"
-        linkedin_match = re.search(
-            r'linkedin\.com/in/([a-zA-Z0-9_\-]+)|linkedin[:\s]+([a-zA-Z0-9_\-]{2,})',
-            cv_content, re.IGNORECASE
+        tasks = "\n\n".join(
+            f"[TÂCHE {i}]\n{prompt}" for i, (prompt, _, _) in enumerate(batch)
         )
-        if linkedin_match:
-            info['linkedin'] = (linkedin_match.group(1) or linkedin_match.group(2)).strip()
-
-        return info
-
-    def _build_moderncv_latex(self, data: dict) -> str:
-        """Build a complete ModernCV LaTeX document from structured data."""
-        personal = data.get("personal", {})
-        profile = data.get("profile", "")
-        skills = data.get("skills", [])
-        experience = data.get("experience", [])
-        education = data.get("education", [])
-        interests = data.get("interests", "")
-
-        # Escape LaTeX special characters
-        def esc(text):
-            if not text:
-                return ""
-            text = str(text)
-            replacements = [
-                ('\\', '\\textbackslash{}'),
-                ('&', '\\&'),
-                ('%', '\\%'),
-                ('$', '\\$'),
-                ('#', '\\#'),
-                ('_', '\\_'),
-                ('{', '\\{'),
-                ('}', '\\}'),
-                ('~', '\\textasciitilde{}'),
-                ('^', '\\textasciicircum{}'),
-            ]
-            for old, new in replacements:
-                text = text.replace(old, new)
-            # Convert **bold** to \textbf{bold}
-            import re
-            text = re.sub(r'\*\*([^*]+)\*\*', r'\\textbf{\1}', text)
-            return text
-
-        # Build header
-        firstname = esc(personal.get("firstname", "Prénom"))
-        lastname = esc(personal.get("lastname", "NOM"))
-        title = esc(personal.get("title", ""))
-        address = esc(personal.get("address", "France"))
-        mobility = esc(personal.get("mobility", ""))
-        phone = esc(personal.get("phone", ""))
-        email = personal.get("email", "")  # Don't escape email
-        github = personal.get("github", "")
-        linkedin = personal.get("linkedin", "")
-
-        # Build skills section
-        skills_latex = ""
-        for skill in skills:
-            cat = esc(skill.get("category", ""))
-            items = esc(skill.get("items", ""))
-            if cat and items:
-                skills_latex += f"\\cvitem{{{cat}}}{{{items}}}\n"
-
-        # Build experience section
-        experience_latex = ""
-        for exp in experience:
-            dates = esc(exp.get("dates", ""))
-            exp_title = esc(exp.get("title", ""))
-            company = esc(exp.get("company", ""))
-            location = esc(exp.get("location", ""))
-            description = esc(exp.get("description", ""))
-            bullets = exp.get("bullets", [])
-
-            bullets_latex = ""
-            if bullets:
-                bullets_latex = "\\begin{itemize}\n"
-                for b in bullets:
-                    bullets_latex += f"\\item {esc(b)}\n"
-                bullets_latex += "\\end{itemize}"
-
-            experience_latex += f"""\\cventry{{{dates}}}{{{exp_title}}}{{{company}}}{{{location}}}{{}}{{
+        combined = f"{BATCH_HEADER}\n\n{tasks}"
+        timeout = max(t for _, t, _ in batch)
+
+        try:
+            response = await run_claude_raw(combined, timeout)
+            answers = _extract_json_array(response)
+        except Exception:
+            answers = None
+
+        if not isinstance(answers, list) or len(answers) != len(batch):
+            # Batched answer unusable - fall back to individual calls
+            for item in batch:
+                await self._execute([item])
+            return
+
+        for (_, _, fut), answer in zip(batch, answers):
+            if not fut.done():
+                if isinstance(answer, str):
+                    fut.set_result(answer)
+                else:
+                    fut.set_result(json.dumps(answer, ensure_ascii=False))
+
+
+def _extract_json_array(response: str):
+    """Pull the first JSON array out of a Claude response, or None."""
+    response = response.strip()
+    try:
+        parsed = json.loads(response)
+        return parsed if isinstance(parsed, list) else None
+    except json.JSONDecodeError:
+        pass
+
+    start = response.find("[")
+    end = response.rfind("]") + 1
+    if start >= 0 and end > start:
+        try:
+            parsed = json.loads(response[start:end])
+            return parsed if isinstance(parsed, list) else None
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+CLAUDE_BATCH_MAX = int(os.environ.get("CLAUDE_BATCH_MAX", 8))
+CLAUDE_BATCH_WAIT_MS = int(os.environ.get("CLAUDE_BATCH_WAIT_MS", 15))
+prompt_batcher = (
+    PromptBatcher(CLAUDE_BATCH_MAX, CLAUDE_BATCH_WAIT_MS)
+    if CLAUDE_BATCH_MAX > 1 else None
+)
+
+
+def api_enabled() -> bool:
+    return bool(ANTHROPIC_API_KEY) and httpx is not None
+
+
+# Shared client so API calls reuse pooled connections instead of paying a
+# TCP+TLS handshake each time. Created lazily on first use; per-request
+# timeouts are passed on the call.
+_API_CLIENT = None
+
+
+def _api_client():
+    global _API_CLIENT
+    if _API_CLIENT is None:
+        _API_CLIENT = httpx.AsyncClient()
+    return _API_CLIENT
+
+
+async def run_claude_api(user_prompt: str, system: str, timeout: int) -> str:
+    """Call the Anthropic messages API directly, marking the static system
+    block as cacheable so repeat calls only pay for the dynamic suffix."""
+    payload = {
+        "model": ANTHROPIC_MODEL,
+        "max_tokens": 8192,
+        "messages": [{"role": "user", "content": user_prompt}],
+    }
+    if system:
+        payload["system"] = [{
+            "type": "text",
+            "text": system,
+            "cache_control": {"type": "ephemeral"},
+        }]
+
+    resp = await _api_client().post(
+        ANTHROPIC_API_URL,
+        json=payload,
+        headers={
+            "x-api-key": ANTHROPIC_API_KEY,
+            "anthropic-version": "2023-06-01",
+        },
+        timeout=timeout,
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    return "".join(
+        block.get("text", "")
+        for block in data.get("content", [])
+        if block.get("type") == "text"
+    ).strip()
+
+
+async def run_claude(prompt: str, system: str = "", timeout: int = 120,
+                     no_cache: bool = False) -> str:
+    """Run a prompt through the Anthropic API when configured, otherwise on a
+    warm pooled worker or a one-shot subprocess. Identical prompts are served
+    from the on-disk cache."""
+    full_prompt = f"{system}\n\n{prompt}" if system else prompt
+
+    if not no_cache:
+        cached = llm_cache.get(full_prompt)
+        if cached is not None:
+            return cached
+
+    if api_enabled():
+        try:
+            response = await run_claude_api(prompt, system, timeout)
+        except Exception as e:
+            _log(f"Anthropic API failed, falling back to CLI: {e}")
+            response = None
+    else:
+        response = None
+
+    if response is None:
+        if prompt_batcher is not None:
+            response = await prompt_batcher.submit(full_prompt, timeout)
+        else:
+            response = await run_claude_raw(full_prompt, timeout)
+
+    if not no_cache and response:
+        llm_cache.set(full_prompt, response)
+    return response
+
+
+def cache_bypassed(request: Request, data: dict = None) -> bool:
+    """True when the caller asked to skip the response cache, via the
+    ?no_cache=1 query param, an x-no-cache header, or "no_cache" in the body."""
+    if request.query_params.get("no_cache") == "1":
+        return True
+    if request.headers.get("x-no-cache"):
+        return True
+    return bool(data and data.get("no_cache"))
+
+
+@app.get("/health")
+async def health() -> dict:
+    return {"status": "ok", "service": "claude-server"}
+
+
+@app.post("/prompt")
+async def handle_prompt(request: Request) -> dict:
+    """Generic prompt endpoint."""
+    data = await read_json_body(request)
+    prompt = data.get("prompt", "")
+    if not prompt:
+        raise ValueError("Missing 'prompt' field")
+
+    response = await run_claude(prompt, no_cache=cache_bypassed(request, data))
+    return {"response": response}
+
+
+@app.post("/synthesize")
+async def handle_synthesize(request: Request) -> dict:
+    """Synthesize a job offer."""
+    data = await read_json_body(request)
+    job_description = data.get("job_description", "")
+    if not job_description:
+        raise ValueError("Missing 'job_description' field")
+
+    prompt = f"Offre:\n{job_description}"
+
+    response = await run_claude(prompt, system=SYNTH_SYSTEM,
+                                no_cache=cache_bypassed(request, data))
+    return extract_json(response)
+
+
+@app.post("/match-skills")
+async def handle_match_skills(request: Request) -> dict:
+    """Match CV skills with job requirements."""
+    data = await read_json_body(request)
+    job_description = data.get("job_description", "")
+    cv_content = data.get("cv_content", "CV non fourni")
+
+    prompt = f"CV:\n{cv_content}\n\nOffre:\n{job_description}"
+
+    response = await run_claude(prompt, system=MATCH_SYSTEM,
+                                no_cache=cache_bypassed(request, data))
+    return extract_json(response)
+
+
+@app.post("/salary-analysis")
+async def handle_salary_analysis(request: Request) -> dict:
+    """Analyze salary for a job."""
+    data = await read_json_body(request)
+    job_description = data.get("job_description", "")
+    location = data.get("location", "France")
+
+    prompt = f"Offre:\n{job_description}\n\nLocalisation: {location}"
+
+    response = await run_claude(prompt, system=SALARY_SYSTEM,
+                                no_cache=cache_bypassed(request, data))
+    return extract_json(response)
+
+
+@functools.lru_cache(maxsize=256)
+def _csv(items: tuple) -> str:
+    return ", ".join(items)
+
+
+# Language and fit-level prompt configuration - module-level so the dicts
+# (a few KB of strings) aren't rebuilt and collected on every CV request.
+LANGUAGE_CONFIG = {
+    "fr": {
+        "name": "français",
+        "sections": {
+            "profile": "Profil",
+            "skills": "Compétences clés",
+            "experience": "Expérience professionnelle",
+            "education": "Formation",
+            "interests": "Centres d'intérêt"
+        }
+    },
+    "en": {
+        "name": "English",
+        "sections": {
+            "profile": "Profile",
+            "skills": "Key Skills",
+            "experience": "Professional Experience",
+            "education": "Education",
+            "interests": "Interests"
+        }
+    },
+    "es": {
+        "name": "español",
+        "sections": {
+            "profile": "Perfil",
+            "skills": "Competencias clave",
+            "experience": "Experiencia profesional",
+            "education": "Formación",
+            "interests": "Intereses"
+        }
+    },
+    "de": {
+        "name": "Deutsch",
+        "sections": {
+            "profile": "Profil",
+            "skills": "Kernkompetenzen",
+            "experience": "Berufserfahrung",
+            "education": "Ausbildung",
+            "interests": "Interessen"
+        }
+    }
+}
+
+# Configuration du niveau d'adaptation (fit)
+FIT_CONFIG = {
+    1: {
+        "name": "Standard",
+        "description": "Adaptation légère - garde le CV proche de l'original",
+        "instructions": """NIVEAU STANDARD (conservateur):
+- Reformule légèrement les tâches pour utiliser le vocabulaire de l'offre
+- Garde la structure et le contenu très proches de l'original
+- Ne modifie que les formulations mineures
+- Priorise les expériences pertinentes mais garde toutes les tâches principales"""
+    },
+    2: {
+        "name": "Modéré",
+        "description": "Adaptation modérée - reformule activement pour matcher",
+        "instructions": """NIVEAU MODÉRÉ (équilibré):
+- Reformule activement les tâches pour matcher les compétences demandées
+- Transpose les compétences transférables vers le domaine cible
+- Réorganise les bullets pour mettre en avant les plus pertinentes
+- Peut omettre les tâches peu pertinentes pour gagner de la place
+- Ajoute des métriques et contexte quand c'est honnêtement applicable"""
+    },
+    3: {
+        "name": "Laxiste",
+        "description": "Adaptation maximale - reformulation créative tout en restant honnête",
+        "instructions": """NIVEAU LAXISTE (créatif):
+- Reformulation créative et poussée des tâches
+- Transpose agressivement les compétences vers le nouveau domaine
+- Reformule complètement les bullets pour coller au maximum à l'offre
+- Mets en avant les aspects les plus pertinents même si mineurs dans l'original
+- Utilise le vocabulaire exact de l'offre autant que possible
+- Peut fusionner ou réinterpréter des expériences pour plus de pertinence
+- Reste HONNÊTE: ne jamais inventer d'expériences ou compétences inexistantes"""
+    }
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _cv_prompt_trailer(language: str, fit_level: int) -> str:
+    """Static tail of the CV prompt, memoized per (language, fit_level)."""
+    lang_cfg = LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG["fr"])
+    fit_cfg = FIT_CONFIG.get(fit_level, FIT_CONFIG[1])
+    return f"""LANGUE DE SORTIE: {lang_cfg["name"]} (tout le contenu du CV doit être dans cette langue)
+NIVEAU D'ADAPTATION: {fit_cfg["name"]} - {fit_cfg["description"]}
+
+{fit_cfg["instructions"]}"""
+
+
+def _build_cv_prompt(data: dict) -> str:
+    """Assemble the dynamic part of the CV-generation prompt (the static
+    rules/schema live in CV_SYSTEM)."""
+    cv_content = data.get("cv_content", "")
+    job_title = data.get("job_title", "")
+    company = data.get("company", "")
+    requirements = data.get("requirements", [])
+    highlights = data.get("highlights", [])
+    fit_level = data.get("fit_level", 1)  # 1=standard, 2=modéré, 3=laxiste
+    language = data.get("language", "fr")  # fr, en, es, de, etc.
+
+    return f'''CV SOURCE:
+{cv_content}
+
+POSTE VISÉ: {job_title}
+ENTREPRISE: {company}
+COMPÉTENCES DEMANDÉES: {_csv(tuple(requirements[:8])) if requirements else "Non spécifiées"}
+POINTS FORTS IDENTIFIÉS: {_csv(tuple(highlights[:5])) if highlights else "À identifier"}
+
+{_cv_prompt_trailer(language, fit_level)}'''
+
+
+@app.post("/analyze-job")
+async def handle_analyze_job(request: Request) -> dict:
+    """Run synthesis, skills matching and salary analysis concurrently for
+    one job offer - one round-trip instead of three serialized calls."""
+    data = await read_json_body(request)
+    job_description = data.get("job_description", "")
+    if not job_description:
+        raise ValueError("Missing 'job_description' field")
+    cv_content = data.get("cv_content", "CV non fourni")
+    location = data.get("location", "France")
+    no_cache = cache_bypassed(request, data)
+
+    synth, match, salary = await asyncio.gather(
+        run_claude(f"Offre:\n{job_description}",
+                   system=SYNTH_SYSTEM, no_cache=no_cache),
+        run_claude(f"CV:\n{cv_content}\n\nOffre:\n{job_description}",
+                   system=MATCH_SYSTEM, no_cache=no_cache),
+        run_claude(f"Offre:\n{job_description}\n\nLocalisation: {location}",
+                   system=SALARY_SYSTEM, no_cache=no_cache),
+    )
+
+    return {
+        "synthesis": extract_json(synth),
+        "match": extract_json(match),
+        "salary": extract_json(salary),
+    }
+
+
+@app.post("/generate-cv")
+async def handle_generate_cv(request: Request) -> dict:
+    """Generate a tailored CV in LaTeX ModernCV format."""
+    data = await read_json_body(request)
+    cv_content = data.get("cv_content", "")
+    prompt = _build_cv_prompt(data)
+
+    response = await run_claude(prompt, system=CV_SYSTEM, timeout=180,
+                                no_cache=cache_bypassed(request, data))
+    result = extract_json(response)
+
+    # Extraire les infos de contact directement du CV source (fiable)
+    # et les injecter dans le JSON pour qu'elles ne soient jamais perdues
+    contact = _extract_contact_info(cv_content)
+    if contact:
+        personal = result.get("personal", {})
+        if not isinstance(personal, dict):
+            personal = {}
+        for field in ("phone", "email", "github", "linkedin"):
+            if field in contact:
+                personal[field] = contact[field]
+        result["personal"] = personal
+
+    # Si parsing échoué, retourner le contenu brut
+    if "raw_response" in result:
+        return {
+            "latex_content": "",
+            "cv_text": result.get("raw_response", ""),
+            "adaptations": ["CV généré (format brut)"],
+            "summary": "Le CV a été généré mais le parsing JSON a échoué."
+        }
+
+    # Générer le LaTeX ModernCV
+    try:
+        latex_content = _build_moderncv_latex(result)
+        cv_text = _build_cv_text(result)
+
+        return {
+            "latex_content": latex_content,
+            "cv_text": cv_text,
+            "adaptations": result.get("adaptations", []),
+            "summary": result.get("summary", "CV adapté généré avec succès.")
+        }
+    except Exception as e:
+        _log(f"Error building LaTeX: {e}")
+        traceback.print_exc()
+        return {
+            "latex_content": "",
+            "cv_text": str(result),
+            "adaptations": ["Erreur lors de la génération LaTeX"],
+            "summary": f"Erreur: {str(e)}"
+        }
+
+
+def _extract_contact_info(cv_content: str) -> dict:
+    """Extract contact info from CV source text using regex.
+    Returns only the fields actually found, so missing ones won't override Claude's output."""
+    import re
+    info = {}
+
+    # Phone: +33 7 82 38 16 99 / +33782381699 / 07 82 38 16 99 / etc.
+    phone_match = re.search(
+        r'(\+\d{1,3}[\s\.\-]?\d[\d\s\.\-]{6,17}\d|\b0\d[\s\.\-]?\d{2}[\s\.\-]?\d{2}[\s\.\-]?\d{2}[\s\.\-]?\d{2}\b)',
+        cv_content
+    )
+    if phone_match:
+        info['phone'] = phone_match.group(1).strip()
+
+    # Email
+    email_match = re.search(r'[\w\.\-\+]+@[\w\.\-]+\.[a-zA-Z]{2,}', cv_content)
+    if email_match:
+        info['email'] = email_match.group(0)
+
+    # GitHub: github.com/username or "github: username" or "github username"
+    github_match = re.search(
+        r'github\.com/([a-zA-Z0-9_\-]+)|github[:\s]+([a-zA-Z0-9_\-]{2,})',
+        cv_content, re.IGNORECASE
+    )
+    if github_match:
+        info['github'] = (github_match.group(1) or github_match.group(2)).strip()
+
+    # LinkedIn: linkedin.com/in/username or "linkedin: username"
+    linkedin_match = re.search(
+        r'linkedin\.com/in/([a-zA-Z0-9_\-]+)|linkedin[:\s]+([a-zA-Z0-9_\-]{2,})',
+        cv_content, re.IGNORECASE
+    )
+    if linkedin_match:
+        info['linkedin'] = (linkedin_match.group(1) or linkedin_match.group(2)).strip()
+
+    return info
+
+
+# LaTeX escaping for _build_moderncv_latex: one translate pass instead of
+# ten chained str.replace calls, with the bold pattern compiled once.
+_LATEX_TRANS = str.maketrans({
+    '\\': '\\textbackslash{}',
+    '&': '\\&',
+    '%': '\\%',
+    '$': '\\$',
+    '#': '\\#',
+    '_': '\\_',
+    '{': '\\{',
+    '}': '\\}',
+    '~': '\\textasciitilde{}',
+    '^': '\\textasciicircum{}',
+})
+_BOLD_RE = re.compile(r'\*\*([^*]+)\*\*')
+# Splits 'a | b | c' rows into already-stripped parts in one C-level pass
+_PIPE_SPLIT = re.compile(r'\s*\|\s*')
+# Fast-path probes: most CV prose contains nothing to escape, so one
+# C-level search lets the escape helpers return the input untouched
+_LATEX_SPECIALS_RE = re.compile(r'[\\&%$#_{}~^*]')
+_HTML_SPECIALS_RE = re.compile(r'[&<>*]')
+
+
+def _latex_esc(text):
+    """Escape LaTeX special characters and convert **bold** to \\textbf."""
+    if not text:
+        return ""
+    text = str(text)
+    if not _LATEX_SPECIALS_RE.search(text):
+        return text
+    return _BOLD_RE.sub(r'\\textbf{\1}', str(text).translate(_LATEX_TRANS))
+
+
+def _build_moderncv_latex(data: dict) -> str:
+    """Build a complete ModernCV LaTeX document from structured data."""
+    personal = data.get("personal", {})
+    profile = data.get("profile", "")
+    skills = data.get("skills", [])
+    experience = data.get("experience", [])
+    education = data.get("education", [])
+    interests = data.get("interests", "")
+
+    esc = _latex_esc
+
+    # Build header
+    firstname = esc(personal.get("firstname", "Prénom"))
+    lastname = esc(personal.get("lastname", "NOM"))
+    title = esc(personal.get("title", ""))
+    address = esc(personal.get("address", "France"))
+    mobility = esc(personal.get("mobility", ""))
+    phone = esc(personal.get("phone", ""))
+    email = personal.get("email", "")  # Don't escape email
+    github = personal.get("github", "")
+    linkedin = personal.get("linkedin", "")
+
+    # Build skills section (accumulate in lists, join once - avoids the
+    # quadratic growth of repeated string concatenation on long CVs)
+    skills_parts = []
+    for skill in skills:
+        cat = esc(skill.get("category", ""))
+        items = esc(skill.get("items", ""))
+        if cat and items:
+            skills_parts.append(f"\\cvitem{{{cat}}}{{{items}}}\n")
+    skills_latex = "".join(skills_parts)
+
+    # Build experience section
+    experience_parts = []
+    for exp in experience:
+        dates = esc(exp.get("dates", ""))
+        exp_title = esc(exp.get("title", ""))
+        company = esc(exp.get("company", ""))
+        location = esc(exp.get("location", ""))
+        description = esc(exp.get("description", ""))
+        bullets = exp.get("bullets", [])
+
+        bullets_latex = ""
+        if bullets:
+            bullet_parts = ["\\begin{itemize}\n"]
+            bullet_parts.extend(f"\\item {esc(b)}\n" for b in bullets)
+            bullet_parts.append("\\end{itemize}")
+            bullets_latex = "".join(bullet_parts)
+
+        experience_parts.append(f"""\\cventry{{{dates}}}{{{exp_title}}}{{{company}}}{{{location}}}{{}}{{
 {description}
 {bullets_latex}}}
 
-"""
-
-        # Build education section
-        education_latex = ""
-        for edu in education:
-            dates = esc(edu.get("dates", ""))
-            degree = esc(edu.get("degree", ""))
-            school = esc(edu.get("school", ""))
-            details = esc(edu.get("details", ""))
-            education_latex += f"\\cventry{{{dates}}}{{{degree}}}{{{school}}}{{}}{{}}{{{details}}}\n\n"
-
-        # Build social links
-        social_latex = ""
-        if github:
-            social_latex += f"\\social[github]{{{github}}}\n"
-        if linkedin:
-            social_latex += f"\\social[linkedin]{{{linkedin}}}\n"
-
-        # Format phone with non-breaking spaces (LaTeX convention)
-        phone_formatted = phone.replace(" ", "~") if phone else ""
-        phone_line = f"\\phone[mobile]{{{phone_formatted}}}\n" if phone_formatted else ""
-        email_line = f"\\email{{{email}}}\n" if email else ""
-
-        # Build complete document
-        latex = f"""\\documentclass[a4paper,11pt]{{moderncv}}
+""")
+    experience_latex = "".join(experience_parts)
+
+    # Build education section
+    education_parts = []
+    for edu in education:
+        dates = esc(edu.get("dates", ""))
+        degree = esc(edu.get("degree", ""))
+        school = esc(edu.get("school", ""))
+        details = esc(edu.get("details", ""))
+        education_parts.append(f"\\cventry{{{dates}}}{{{degree}}}{{{school}}}{{}}{{}}{{{details}}}\n\n")
+    education_latex = "".join(education_parts)
+
+    # Build social links
+    social_parts = []
+    if github:
+        social_parts.append(f"\\social[github]{{{github}}}\n")
+    if linkedin:
+        social_parts.append(f"\\social[linkedin]{{{linkedin}}}\n")
+    social_latex = "".join(social_parts)
+
+    # Format phone with non-breaking spaces (LaTeX convention)
+    phone_formatted = phone.replace(" ", "~") if phone else ""
+    phone_line = f"\\phone[mobile]{{{phone_formatted}}}\n" if phone_formatted else ""
+    email_line = f"\\email{{{email}}}\n" if email else ""
+
+    # Build complete document
+    latex = f"""\\documentclass[a4paper,11pt]{{moderncv}}
 \\moderncvstyle[symbols]{{classic}}
 \\moderncvcolor{{blue}}
 \\usepackage[scale=0.95]{{geometry}}
@@ -606,60 +1215,158 @@ NE PAS INVENTER d'expériences, mais reformuler honnêtement celles existantes p
 
 \\end{{document}}
 """
-        return latex
-
-    def _build_cv_text(self, data: dict) -> str:
-        """Build a plain text version of the CV for display."""
-        personal = data.get("personal", {})
-        profile = data.get("profile", "")
-        skills = data.get("skills", [])
-        experience = data.get("experience", [])
-        education = data.get("education", [])
-        interests = data.get("interests", "")
-
-        lines = []
-
-        # Header
-        lines.append(f"[NOM]")
-        lines.append(f"{personal.get('firstname', '')} {personal.get('lastname', '')}")
-        lines.append("")
-        lines.append(f"[TITRE]")
-        lines.append(personal.get("title", ""))
+    return latex
+
+
+def _build_cv_text(data: dict) -> str:
+    """Build a plain text version of the CV for display."""
+    personal = data.get("personal", {})
+    profile = data.get("profile", "")
+    skills = data.get("skills", [])
+    experience = data.get("experience", [])
+    education = data.get("education", [])
+    interests = data.get("interests", "")
+
+    lines = []
+
+    # Header
+    lines.append(f"[NOM]")
+    lines.append(f"{personal.get('firstname', '')} {personal.get('lastname', '')}")
+    lines.append("")
+    lines.append(f"[TITRE]")
+    lines.append(personal.get("title", ""))
+    lines.append("")
+
+    # Profile
+    lines.append("[PROFIL]")
+    lines.append(profile.replace("**", ""))
+    lines.append("")
+
+    # Skills
+    lines.append("[COMPETENCES]")
+    for skill in skills:
+        lines.append(f"{skill.get('category', '')}|{skill.get('items', '')}")
+    lines.append("")
+
+    # Experience
+    lines.append("[EXPERIENCE]")
+    for exp in experience:
+        lines.append(f"{exp.get('dates', '')}|{exp.get('title', '')}|{exp.get('company', '')}|{exp.get('location', '')}")
+        for b in exp.get("bullets", []):
+            lines.append(f"- {b}")
         lines.append("")
 
-        # Profile
-        lines.append("[PROFIL]")
-        lines.append(profile.replace("**", ""))
-        lines.append("")
+    # Education
+    lines.append("[FORMATION]")
+    for edu in education:
+        lines.append(f"{edu.get('dates', '')}|{edu.get('degree', '')}|{edu.get('school', '')}|{edu.get('details', '')}")
+    lines.append("")
+
+    # Interests
+    lines.append("[INTERETS]")
+    lines.append(interests)
+
+    return "\n".join(lines)
+
+
+@app.post("/generate-cv/stream")
+async def handle_generate_cv_stream(request: Request):
+    """Stream Claude's raw stream-json events for a CV generation (NDJSON).
+
+    Lets a caller show progress token-by-token instead of waiting the full
+    generation time; the final "result" event carries the complete answer."""
+    data = await read_json_body(request)
+    prompt = f"{CV_SYSTEM}\n\n{_build_cv_prompt(data)}"
+
+    async def event_stream():
+        proc = await asyncio.create_subprocess_exec(
+            *claude_argv("--output-format", "stream-json", "--verbose"),
+            cwd=str(CLAUDE_WORKSPACE),
+            env=claude_env(),
+            preexec_fn=claude_preexec(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            proc.stdin.write(prompt.encode())
+            await proc.stdin.drain()
+            proc.stdin.close()
+            async for line in proc.stdout:
+                yield line
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+            await proc.wait()
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+@app.post("/extract-pdf")
+async def handle_extract_pdf(request: Request):
+    """Extract text from a PDF file.
+
+    Accepts either the usual JSON body with a pdf_base64 field, or the raw
+    PDF bytes with Content-Type: application/pdf - the binary form skips
+    base64's 33% size overhead and the decode pass entirely.
+    """
+    if request.headers.get("content-type", "").startswith("application/pdf"):
+        declared = request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > MAX_BODY:
+            raise BodyTooLarge(f"Body too large (max {MAX_BODY} bytes)")
+        raw = await request.body()
+        if len(raw) > MAX_BODY:
+            raise BodyTooLarge(f"Body too large (max {MAX_BODY} bytes)")
+        work = functools.partial(_extract_pdf, {}, pdf_bytes=raw)
+    else:
+        data = await read_json_body(request)
+        work = functools.partial(_extract_pdf, data)
+    # The PDF libraries are blocking - keep them off the event loop
+    return await asyncio.get_running_loop().run_in_executor(EXECUTOR, work)
+
+
+# Above this many pages, pdfplumber's pure-Python parsing is slow enough
+# that fanning pages out to worker processes beats the hand-off overhead.
+_PARALLEL_PAGE_THRESHOLD = 4
+
+# One persistent pool, created lazily on first use. The "spawn" context
+# avoids fork()ing this threaded process (inherited-lock deadlocks) and
+# reusing the pool keeps the worker startup cost out of every request.
+_PDF_POOL = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _pdf_pool() -> ProcessPoolExecutor:
+    global _PDF_POOL
+    if _PDF_POOL is None:
+        with _PDF_POOL_LOCK:
+            if _PDF_POOL is None:
+                _PDF_POOL = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _PDF_POOL
 
-        # Skills
-        lines.append("[COMPETENCES]")
-        for skill in skills:
-            lines.append(f"{skill.get('category', '')}|{skill.get('items', '')}")
-        lines.append("")
+# Extraction-result LRU: bot users re-upload the same CV in edit-retry
+# loops, so keying on the file bytes skips the whole parse on repeats.
+_EXTRACT_CACHE = OrderedDict()
+_EXTRACT_CACHE_SIZE = 128
+_EXTRACT_CACHE_LOCK = threading.Lock()
 
-        # Experience
-        lines.append("[EXPERIENCE]")
-        for exp in experience:
-            lines.append(f"{exp.get('dates', '')}|{exp.get('title', '')}|{exp.get('company', '')}|{exp.get('location', '')}")
-            for b in exp.get("bullets", []):
-                lines.append(f"- {b}")
-            lines.append("")
-
-        # Education
-        lines.append("[FORMATION]")
-        for edu in education:
-            lines.append(f"{edu.get('dates', '')}|{edu.get('degree', '')}|{edu.get('school', '')}|{edu.get('details', '')}")
-        lines.append("")
+# CVs top out around 20 KB of text; a graphics-heavy or scanned upload can
+# make the extractor chew operators forever, so stop once we clearly have
+# more text than any real CV
+_MAX_EXTRACT_CHARS = 200_000
 
-        # Interests
-        lines.append("[INTERETS]")
-        lines.append(interests)
 
-        return "\n".join(lines)
+def _extract_page(pdf_bytes: bytes, page_idx: int) -> str:
+    """Extract a single page's text in a worker process (pdfplumber path)."""
+    with pdfplumber.open(BytesIO(pdf_bytes), pages=[page_idx + 1]) as pdf:
+        return pdf.pages[0].extract_text() or ""
 
-    def handle_extract_pdf(self, data: dict) -> dict:
-        """Extract text from a PDF file."""
+
+def _extract_pdf(data: dict, pdf_bytes: bytes = None) -> dict:
+    if pdf_bytes is None:
         pdf_base64 = data.get("pdf_base64", "")
         if not pdf_base64:
             return {
@@ -668,314 +1375,492 @@ NE PAS INVENTER d'expériences, mais reformuler honnêtement celles existantes p
                 "text": ""
             }
 
-        if not PDF_EXTRACTOR:
-            return {
-                "success": False,
-                "error": "No PDF library available on server",
-                "text": ""
-            }
-
-        try:
-            # Decode base64 to bytes
-            pdf_bytes = base64.b64decode(pdf_base64)
-
-            # Write to temp file
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-                tmp.write(pdf_bytes)
-                tmp_path = tmp.name
+    if not PDF_EXTRACTOR:
+        return {
+            "success": False,
+            "error": "No PDF library available on server",
+            "text": ""
+        }
 
-            text = ""
+    try:
+        if pdf_bytes is None:
+            # Decode base64 to bytes; every extractor reads them in memory,
+            # so the upload never touches disk. validate=True makes a
+            # corrupted upload fail here instead of letting the extractor
+            # chew on silently-mangled bytes for seconds
             try:
-                if PDF_EXTRACTOR == "pdfplumber":
-                    import pdfplumber
-                    with pdfplumber.open(tmp_path) as pdf:
-                        for page in pdf.pages:
-                            page_text = page.extract_text()
-                            if page_text:
-                                text += page_text + "\n\n"
-                elif PDF_EXTRACTOR == "pypdf2":
-                    import PyPDF2
-                    with open(tmp_path, "rb") as f:
-                        reader = PyPDF2.PdfReader(f)
-                        for page in reader.pages:
-                            page_text = page.extract_text()
-                            if page_text:
-                                text += page_text + "\n\n"
-            finally:
-                # Clean up temp file
-                os.unlink(tmp_path)
-
-            return {
-                "success": True,
-                "text": text.strip(),
-                "extractor": PDF_EXTRACTOR
-            }
+                pdf_bytes = _b64.b64decode(pdf_base64, validate=True)
+            except ValueError:
+                return {
+                    "success": False,
+                    "error": "Invalid base64 in 'pdf_base64' field",
+                    "text": ""
+                }
 
-        except Exception as e:
+        if not pdf_bytes.startswith(b"%PDF-"):
             return {
                 "success": False,
-                "error": str(e),
+                "error": "Not a PDF file (missing %PDF- header)",
                 "text": ""
             }
 
-    def handle_generate_pdf(self, data: dict) -> dict:
-        """Generate PDF from CV content. Tries reportlab first (more reliable), LaTeX as option."""
-        cv_content = data.get("cv_content", "")
-        name = data.get("name", "Candidat")
-        job_title = data.get("job_title", "")
-        company = data.get("company", "")
-        prefer_latex = data.get("prefer_latex", False)
-
-        if not cv_content:
-            return {"success": False, "error": "Missing 'cv_content' field", "pdf_base64": ""}
-
-        try:
-            # Parse CV content into sections
-            sections = self._parse_cv_sections(cv_content, name, job_title)
-            print(f"Parsed sections: name={sections['name']}, title={sections['title']}")
-            print(f"  - profil: {len(sections['profil'])} lines")
-            print(f"  - competences: {len(sections['competences'])} lines")
-            print(f"  - experience: {len(sections['experience'])} lines")
-            print(f"  - formation: {len(sections['formation'])} lines")
-
-            pdf_bytes = None
-            method_used = None
-            latex_error = None
-            reportlab_error = None
-
-            if prefer_latex:
-                # Try LaTeX first if explicitly requested
-                try:
-                    latex_code = self._generate_latex(sections, job_title, company)
-                    pdf_bytes = self._compile_latex(latex_code)
-                    if pdf_bytes:
-                        method_used = "latex"
-                except Exception as e:
-                    latex_error = str(e)
-                    print(f"LaTeX failed: {e}")
-
-            # Try reportlab (default, more reliable)
-            if not pdf_bytes:
-                try:
-                    pdf_bytes = self._generate_pdf_reportlab(sections, job_title, company)
-                    if pdf_bytes:
-                        method_used = "reportlab"
-                except Exception as e:
-                    reportlab_error = str(e)
-                    print(f"reportlab failed: {e}")
-                    traceback.print_exc()
-
-            # If reportlab failed and we haven't tried LaTeX yet, try it
-            if not pdf_bytes and not prefer_latex:
-                try:
-                    print("reportlab failed, trying LaTeX fallback...")
-                    latex_code = self._generate_latex(sections, job_title, company)
-                    pdf_bytes = self._compile_latex(latex_code)
-                    if pdf_bytes:
-                        method_used = "latex"
-                except Exception as e:
-                    latex_error = str(e)
-                    print(f"LaTeX fallback also failed: {e}")
-
-            if pdf_bytes:
-                print(f"PDF generated successfully with {method_used}: {len(pdf_bytes)} bytes")
+        # Optional 1-based page selection: the matching flow only needs the
+        # first page or two of a CV, so skip parsing the rest
+        only_pages = data.get("pages") or None
+        if only_pages is not None:
+            if (not isinstance(only_pages, list)
+                    or not all(isinstance(p, int) and not isinstance(p, bool)
+                               for p in only_pages)):
                 return {
-                    "success": True,
-                    "pdf_base64": base64.b64encode(pdf_bytes).decode('utf-8'),
-                    "size": len(pdf_bytes),
-                    "method": method_used
+                    "success": False,
+                    "error": "'pages' must be a list of 1-based page numbers",
+                    "text": ""
                 }
+            only_pages = sorted({p for p in only_pages if p > 0}) or None
+
+        cache_key = (hashlib.sha256(pdf_bytes).digest(),
+                     tuple(only_pages or ()))
+        with _EXTRACT_CACHE_LOCK:
+            cached = _EXTRACT_CACHE.get(cache_key)
+            if cached is not None:
+                _EXTRACT_CACHE.move_to_end(cache_key)
+                return dict(cached)
+
+        # Accumulate page texts in a list and join once - += rebuilds the
+        # full string on every page
+        parts = []
+        length = 0
+        pages = 0
+        if PDF_EXTRACTOR == "pymupdf":
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                pages = doc.page_count
+                if only_pages:
+                    page_iter = (doc[p - 1] for p in only_pages if p <= pages)
+                else:
+                    page_iter = doc
+                for page in page_iter:
+                    page_text = page.get_text()
+                    if page_text:
+                        parts.append(page_text)
+                        length += len(page_text)
+                    if length > _MAX_EXTRACT_CHARS:
+                        break
+        elif PDF_EXTRACTOR == "pdfplumber":
+            with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+                # Pages are lazy, so opening unfiltered keeps the total
+                # count cheap while only the selected pages get parsed
+                pages = len(pdf.pages)
+                if only_pages:
+                    page_iter = (pdf.pages[p - 1] for p in only_pages
+                                 if p <= pages)
+                else:
+                    page_iter = pdf.pages
+                if only_pages or pages <= _PARALLEL_PAGE_THRESHOLD:
+                    for page in page_iter:
+                        page_text = page.extract_text()
+                        if page_text:
+                            parts.append(page_text)
+                            length += len(page_text)
+                        if length > _MAX_EXTRACT_CHARS:
+                            break
+            if not only_pages and pages > _PARALLEL_PAGE_THRESHOLD:
+                page_texts = _pdf_pool().map(
+                    functools.partial(_extract_page, pdf_bytes), range(pages)
+                )
+                parts = []
+                length = 0
+                for t in page_texts:
+                    if t:
+                        parts.append(t)
+                        length += len(t)
+                    if length > _MAX_EXTRACT_CHARS:
+                        break
+        elif PDF_EXTRACTOR == "pypdf2":
+            reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
+            pages = len(reader.pages)
+            if only_pages:
+                page_iter = (reader.pages[p - 1] for p in only_pages
+                             if p <= pages)
+            else:
+                page_iter = reader.pages
+            for page in page_iter:
+                page_text = page.extract_text()
+                if page_text:
+                    parts.append(page_text)
+                    length += len(page_text)
+                if length > _MAX_EXTRACT_CHARS:
+                    break
+        text = "\n\n".join(parts)
+
+        result = {
+            "success": True,
+            "text": text.strip(),
+            "pages": pages,
+            "extractor": PDF_EXTRACTOR
+        }
+        with _EXTRACT_CACHE_LOCK:
+            _EXTRACT_CACHE[cache_key] = result
+            _EXTRACT_CACHE.move_to_end(cache_key)
+            while len(_EXTRACT_CACHE) > _EXTRACT_CACHE_SIZE:
+                _EXTRACT_CACHE.popitem(last=False)
+        return dict(result)
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "text": ""
+        }
 
-            # Both failed
-            error_details = []
-            if reportlab_error:
-                error_details.append(f"reportlab: {reportlab_error}")
-            if latex_error:
-                error_details.append(f"LaTeX: {latex_error}")
 
-            error_msg = "PDF generation failed. " + "; ".join(error_details) if error_details else "Both methods failed"
-            return {"success": False, "error": error_msg, "pdf_base64": ""}
+@app.post("/generate-pdf")
+async def handle_generate_pdf(request: Request):
+    """Generate PDF from CV content. Tries reportlab first (more reliable), LaTeX as option.
+
+    With Accept: application/pdf (or ?binary=1) the PDF bytes are returned
+    directly, skipping the base64 step and its 33% size blowup; the
+    JSON+base64 body stays the default for existing clients."""
+    data = await read_json_body(request)
+    want_binary = (request.headers.get("accept") == "application/pdf"
+                   or request.query_params.get("binary") == "1")
+    # reportlab and pdflatex are blocking - keep them off the event loop
+    result = await asyncio.get_running_loop().run_in_executor(
+        EXECUTOR, functools.partial(_generate_pdf, data, raw=want_binary))
+    if want_binary and result.get("success"):
+        return Response(
+            content=result["pdf_bytes"],
+            media_type="application/pdf",
+            headers={"Content-Disposition": 'attachment; filename="cv.pdf"'},
+        )
+    return result
 
-        except Exception as e:
-            traceback.print_exc()
-            return {"success": False, "error": f"PDF generation error: {str(e)}", "pdf_base64": ""}
-
-    def _parse_cv_sections(self, cv_content, default_name, default_title):
-        """Parse CV content into structured sections."""
-        lines = cv_content.strip().split('\n')
-        sections = {
-            'name': default_name,
-            'title': default_title,
-            'profil': [],
-            'competences': [],
-            'experience': [],
-            'formation': [],
-            'interets': []
-        }
 
-        current_section = None
-
-        # Section mapping (case-insensitive)
-        section_map = {
-            'nom': 'name', 'name': 'name',
-            'titre': 'title', 'title': 'title',
-            'profil': 'profil', 'profile': 'profil', 'summary': 'profil', 'résumé': 'profil',
-            'competences': 'competences', 'compétences': 'competences', 'competences cles': 'competences',
-            'compétences clés': 'competences', 'skills': 'competences',
-            'experience': 'experience', 'expérience': 'experience', 'experience professionnelle': 'experience',
-            'expérience professionnelle': 'experience', 'work experience': 'experience',
-            'formation': 'formation', 'education': 'formation', 'études': 'formation',
-            'interets': 'interets', 'intérêts': 'interets', 'interêts': 'interets',
-            'centres d\'intérêt': 'interets', 'hobbies': 'interets', 'interests': 'interets'
-        }
+# Finished-PDF LRU: users regenerate the same CV often (retries, re-sent
+# job offers), and both generators are pure functions of their inputs, so
+# identical requests can skip the whole render/compile pipeline.
+_PDF_CACHE = OrderedDict()
+_PDF_CACHE_SIZE = 64
+_PDF_CACHE_LOCK = threading.Lock()
+# Per-thread scratch buffers for the render path
+_TLS = threading.local()
 
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
 
-            # Section tags [SECTION]
-            if line.startswith('[') and line.endswith(']'):
-                tag = line[1:-1].lower().strip()
-                current_section = section_map.get(tag, tag if tag in sections else None)
-                continue
+def _pdf_cache_key(sections, job_title, company, prefer_latex, allow_latex_fallback):
+    payload = json.dumps(
+        {"s": sections, "j": job_title, "c": company,
+         "l": prefer_latex, "f": allow_latex_fallback},
+        sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
 
-            # Check for uppercase section headers (with or without colon)
-            clean_line = line.replace(':', '').strip()
-            if clean_line.isupper() or (len(clean_line) < 50 and clean_line.upper() == clean_line):
-                lower_clean = clean_line.lower()
-                if lower_clean in section_map:
-                    current_section = section_map[lower_clean]
-                    continue
 
-            # Also check for "## Section" markdown headers
-            if line.startswith('#'):
-                header = line.lstrip('#').strip().lower()
-                if header in section_map:
-                    current_section = section_map[header]
-                    continue
+def _pdf_cache_get(key):
+    with _PDF_CACHE_LOCK:
+        entry = _PDF_CACHE.get(key)
+        if entry is not None:
+            _PDF_CACHE.move_to_end(key)
+        return entry
 
-            # Add content to current section
-            if current_section:
-                if current_section == 'name':
-                    sections['name'] = line
-                    current_section = None  # Only take first line for name
-                elif current_section == 'title':
-                    sections['title'] = line
-                    current_section = None  # Only take first line for title
-                elif current_section in sections and isinstance(sections[current_section], list):
-                    sections[current_section].append(line)
-
-        return sections
-
-    def _latex_escape(self, text):
-        """Escape special LaTeX characters and convert markdown to LaTeX."""
-        if not text:
-            return ""
-        # First convert **bold** to a placeholder (before escaping)
-        import re
-        bold_matches = re.findall(r'\*\*([^*]+)\*\*', text)
-        for i, match in enumerate(bold_matches):
-            text = text.replace(f'**{match}**', f'<<<BOLD{i}>>>', 1)
-
-        # Escape LaTeX special characters
-        replacements = [
-            ('\\', '\\textbackslash{}'),
-            ('&', '\\&'),
-            ('%', '\\%'),
-            ('$', '\\$'),
-            ('#', '\\#'),
-            ('_', '\\_'),
-            ('{', '\\{'),
-            ('}', '\\}'),
-            ('~', '\\textasciitilde{}'),
-            ('^', '\\textasciicircum{}'),
-        ]
-        for old, new in replacements:
-            text = text.replace(old, new)
-
-        # Restore bold with LaTeX formatting (escape the content too)
-        for i, match in enumerate(bold_matches):
-            escaped_match = match
-            for old, new in replacements:
-                escaped_match = escaped_match.replace(old, new)
-            text = text.replace(f'<<<BOLD{i}>>>', f'\\textbf{{{escaped_match}}}')
 
-        return text
+def _pdf_cache_set(key, pdf_bytes, method):
+    with _PDF_CACHE_LOCK:
+        _PDF_CACHE[key] = (pdf_bytes, method)
+        _PDF_CACHE.move_to_end(key)
+        while len(_PDF_CACHE) > _PDF_CACHE_SIZE:
+            _PDF_CACHE.popitem(last=False)
 
-    def _generate_latex(self, sections, job_title, company):
-        """Generate ModernCV LaTeX code."""
 
-        # Parse name
-        name_parts = sections['name'].split()
-        if len(name_parts) >= 2:
-            firstname = self._latex_escape(name_parts[0])
-            lastname = self._latex_escape(' '.join(name_parts[1:]))
-        else:
-            firstname = self._latex_escape(sections['name'])
-            lastname = ""
+def _generate_pdf(data: dict, raw: bool = False) -> dict:
+    cv_content = data.get("cv_content", "")
+    name = data.get("name", "Candidat")
+    job_title = data.get("job_title", "")
+    company = data.get("company", "")
+    prefer_latex = data.get("prefer_latex", False)
+    # pdflatex is the multi-second path; only fall back to it from a
+    # reportlab failure when the caller opted in, so p99 stays bounded
+    allow_latex_fallback = data.get("allow_latex_fallback", False)
 
-        title = self._latex_escape(sections['title'] or job_title)
+    if not cv_content:
+        return {"success": False, "error": "Missing 'cv_content' field", "pdf_base64": ""}
 
-        # Build competences
-        competences_latex = ""
-        for line in sections['competences']:
-            if '|' in line:
-                parts = line.split('|', 1)
-                label = self._latex_escape(parts[0].strip())
-                value = self._latex_escape(parts[1].strip())
-                competences_latex += f"\\cvitem{{{label}}}{{{value}}}\n"
-            elif ':' in line:
-                parts = line.split(':', 1)
-                label = self._latex_escape(parts[0].strip())
-                value = self._latex_escape(parts[1].strip())
-                competences_latex += f"\\cvitem{{{label}}}{{{value}}}\n"
-
-        # Build experience
-        experience_latex = ""
-        current_entry = None
-        current_bullets = []
-
-        for line in sections['experience']:
-            if '|' in line and not line.startswith('-'):
-                # Save previous entry
-                if current_entry:
-                    experience_latex += self._format_cventry(current_entry, current_bullets)
-                    current_bullets = []
-                # Parse: 2023-2025|Poste|Entreprise|Lieu
-                parts = [p.strip() for p in line.split('|')]
-                current_entry = {
-                    'dates': self._latex_escape(parts[0]) if len(parts) > 0 else "",
-                    'title': self._latex_escape(parts[1]) if len(parts) > 1 else "",
-                    'company': self._latex_escape(parts[2]) if len(parts) > 2 else "",
-                    'location': self._latex_escape(parts[3]) if len(parts) > 3 else "",
-                }
-            elif line.startswith('-') or line.startswith('•'):
-                bullet = line.lstrip('-•* ').strip()
-                current_bullets.append(self._latex_escape(bullet))
+    try:
+        # Parse CV content into sections
+        sections = _parse_cv_sections(cv_content, name, job_title)
+        _log(f"Parsed sections: name={sections['name']}, title={sections['title']}")
+        _log(f"  - profil: {len(sections['profil'])} lines")
+        _log(f"  - competences: {len(sections['competences'])} lines")
+        _log(f"  - experience: {len(sections['experience'])} lines")
+        _log(f"  - formation: {len(sections['formation'])} lines")
+
+        cache_key = _pdf_cache_key(sections, job_title, company,
+                                   prefer_latex, allow_latex_fallback)
+        cached = _pdf_cache_get(cache_key)
+        if cached:
+            pdf_bytes, method_used = cached
+            _log(f"PDF cache hit ({method_used}): {len(pdf_bytes)} bytes")
+            if raw:
+                return {"success": True, "pdf_bytes": pdf_bytes, "method": method_used}
+            return {
+                "success": True,
+                "pdf_base64": _b64.b64encode(pdf_bytes).decode('ascii'),
+                "size": len(pdf_bytes),
+                "method": method_used
+            }
 
-        if current_entry:
-            experience_latex += self._format_cventry(current_entry, current_bullets)
+        pdf_bytes = None
+        method_used = None
+        latex_error = None
+        reportlab_error = None
 
-        # Build formation
-        formation_latex = ""
-        for line in sections['formation']:
-            if '|' in line:
-                parts = [p.strip() for p in line.split('|')]
-                dates = self._latex_escape(parts[0]) if len(parts) > 0 else ""
-                diplome = self._latex_escape(parts[1]) if len(parts) > 1 else ""
-                ecole = self._latex_escape(parts[2]) if len(parts) > 2 else ""
-                detail = self._latex_escape(parts[3]) if len(parts) > 3 else ""
-                formation_latex += f"\\cventry{{{dates}}}{{{diplome}}}{{{ecole}}}{{}}{{}}{{{detail}}}\n"
+        if prefer_latex:
+            # Try LaTeX first if explicitly requested
+            try:
+                latex_code = _generate_latex(sections, job_title, company)
+                pdf_bytes = _compile_latex(latex_code)
+                if pdf_bytes:
+                    method_used = "latex"
+            except Exception as e:
+                latex_error = str(e)
+                _log(f"LaTeX failed: {e}")
+
+        # Try reportlab (default, more reliable)
+        if not pdf_bytes:
+            try:
+                pdf_bytes = _generate_pdf_reportlab(sections, job_title, company)
+                if pdf_bytes:
+                    method_used = "reportlab"
+            except Exception as e:
+                reportlab_error = str(e)
+                _log(f"reportlab failed: {e}")
+                traceback.print_exc()
+
+        # If reportlab failed and we haven't tried LaTeX yet, try it -
+        # but only when the caller allows the slow path
+        if not pdf_bytes and not prefer_latex and allow_latex_fallback:
+            try:
+                _log("reportlab failed, trying LaTeX fallback...")
+                latex_code = _generate_latex(sections, job_title, company)
+                pdf_bytes = _compile_latex(latex_code)
+                if pdf_bytes:
+                    method_used = "latex"
+            except Exception as e:
+                latex_error = str(e)
+                _log(f"LaTeX fallback also failed: {e}")
+
+        if pdf_bytes:
+            _log(f"PDF generated successfully with {method_used}: {len(pdf_bytes)} bytes")
+            _pdf_cache_set(cache_key, pdf_bytes, method_used)
+            if raw:
+                return {"success": True, "pdf_bytes": pdf_bytes, "method": method_used}
+            return {
+                "success": True,
+                "pdf_base64": _b64.b64encode(pdf_bytes).decode('ascii'),
+                "size": len(pdf_bytes),
+                "method": method_used
+            }
 
-        # Build profil
-        profil_text = ' '.join([self._latex_escape(p) for p in sections['profil']])
+        # Both failed
+        error_details = []
+        if reportlab_error:
+            error_details.append(f"reportlab: {reportlab_error}")
+        if latex_error:
+            error_details.append(f"LaTeX: {latex_error}")
+
+        error_msg = "PDF generation failed. " + "; ".join(error_details) if error_details else "Both methods failed"
+        return {"success": False, "error": error_msg, "pdf_base64": ""}
+
+    except Exception as e:
+        traceback.print_exc()
+        return {"success": False, "error": f"PDF generation error: {str(e)}", "pdf_base64": ""}
+
+
+# Section mapping (case-insensitive) - built once, shared by every parse
+_SECTION_MAP = {
+    'nom': 'name', 'name': 'name',
+    'titre': 'title', 'title': 'title',
+    'profil': 'profil', 'profile': 'profil', 'summary': 'profil', 'résumé': 'profil',
+    'competences': 'competences', 'compétences': 'competences', 'competences cles': 'competences',
+    'compétences clés': 'competences', 'skills': 'competences',
+    'experience': 'experience', 'expérience': 'experience', 'experience professionnelle': 'experience',
+    'expérience professionnelle': 'experience', 'work experience': 'experience',
+    'formation': 'formation', 'education': 'formation', 'études': 'formation',
+    'interets': 'interets', 'intérêts': 'interets', 'interêts': 'interets',
+    'centres d\'intérêt': 'interets', 'hobbies': 'interets', 'interests': 'interets'
+}
+
+_LIST_SECTIONS = ('profil', 'competences', 'experience', 'formation', 'interets')
+
+
+def _parse_cv_sections(cv_content, default_name, default_title):
+    """Parse CV content into structured sections."""
+    lines = cv_content.strip().split('\n')
+    sections = {'name': default_name, 'title': default_title}
+    sections.update((key, []) for key in _LIST_SECTIONS)
+
+    current_section = None
+    section_map = _SECTION_MAP
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Section tags [SECTION]
+        if line.startswith('[') and line.endswith(']'):
+            tag = line[1:-1].lower().strip()
+            current_section = section_map.get(tag, tag if tag in sections else None)
+            continue
+
+        # Check for uppercase section headers (with or without colon).
+        # isupper() covers the old upper()==line check without allocating
+        # an upper-cased copy of every line; caseless lines can't be in
+        # the section map anyway.
+        clean_line = line.replace(':', '').strip()
+        if clean_line and len(clean_line) < 50 and clean_line.isupper():
+            lower_clean = clean_line.lower()
+            if lower_clean in section_map:
+                current_section = section_map[lower_clean]
+                continue
 
-        # Build interets
-        interets_text = ', '.join([self._latex_escape(i) for i in sections['interets']])
+        # Also check for "## Section" markdown headers
+        if line.startswith('#'):
+            header = line.lstrip('#').strip().lower()
+            if header in section_map:
+                current_section = section_map[header]
+                continue
 
-        # Generate full LaTeX document
-        latex = f'''\\documentclass[a4paper,11pt]{{moderncv}}
+        # Add content to current section
+        if current_section:
+            if current_section == 'name':
+                sections['name'] = line
+                current_section = None  # Only take first line for name
+            elif current_section == 'title':
+                sections['title'] = line
+                current_section = None  # Only take first line for title
+            elif current_section in sections and isinstance(sections[current_section], list):
+                sections[current_section].append(line)
+
+    return sections
+
+
+@functools.lru_cache(maxsize=2048)
+def _latex_escape(text):
+    """Escape special LaTeX characters and convert markdown to LaTeX.
+
+    Memoized: skill labels, dates and diploma names repeat heavily when
+    the same CV is regenerated for different job offers."""
+    if not text:
+        return ""
+    if not _LATEX_SPECIALS_RE.search(text):
+        return text
+    # _BOLD_RE.split alternates plain text (even indexes) with bold bodies
+    # (odd indexes), so one scan handles both escaping and **bold** - no
+    # placeholder round-trip
+    parts = _BOLD_RE.split(text)
+    return ''.join(
+        part.translate(_LATEX_TRANS) if i % 2 == 0
+        else f'\\textbf{{{part.translate(_LATEX_TRANS)}}}'
+        for i, part in enumerate(parts)
+    )
+
+
+def _experience_records(lines):
+    """Single structuring pass over raw experience lines.
+
+    Shared by the LaTeX and reportlab generators so each doesn't re-scan
+    every line for pipes and bullet markers; fields stay unescaped because
+    escaping is format-specific."""
+    records = []
+    entry = None
+    bullets = []
+    for line in lines:
+        first = line[:1]
+        if first not in '-•' and '|' in line:
+            if entry:
+                entry['bullets'] = bullets
+                bullets = []
+            parts = _PIPE_SPLIT.split(line.strip())
+            entry = {
+                'dates': parts[0] if len(parts) > 0 else "",
+                'title': parts[1] if len(parts) > 1 else "",
+                'company': parts[2] if len(parts) > 2 else "",
+                'location': parts[3] if len(parts) > 3 else "",
+                'bullets': [],
+            }
+            records.append(entry)
+        elif first in '-•':
+            bullets.append(line.lstrip('-•* ').strip())
+    if entry:
+        entry['bullets'] = bullets
+    return records
+
+
+def _generate_latex(sections, job_title, company):
+    """Generate ModernCV LaTeX code."""
+
+    # Parse name
+    name_parts = sections['name'].split()
+    if len(name_parts) >= 2:
+        firstname = _latex_escape(name_parts[0])
+        lastname = _latex_escape(' '.join(name_parts[1:]))
+    else:
+        firstname = _latex_escape(sections['name'])
+        lastname = ""
+
+    title = _latex_escape(sections['title'] or job_title)
+
+    # Build competences
+    competences_parts = []
+    for line in sections['competences']:
+        if '|' in line:
+            parts = _PIPE_SPLIT.split(line.strip(), maxsplit=1)
+            label = _latex_escape(parts[0])
+            value = _latex_escape(parts[1])
+            competences_parts.append(f"\\cvitem{{{label}}}{{{value}}}\n")
+        elif ':' in line:
+            parts = line.split(':', 1)
+            label = _latex_escape(parts[0].strip())
+            value = _latex_escape(parts[1].strip())
+            competences_parts.append(f"\\cvitem{{{label}}}{{{value}}}\n")
+    competences_latex = ''.join(competences_parts)
+
+    # Build experience from the shared structuring pass; the itemize
+    # wrapper is only emitted when an entry actually has bullets
+    experience_parts = []
+    for rec in _experience_records(sections['experience']):
+        exp_dates = _latex_escape(rec['dates'])
+        exp_title = _latex_escape(rec['title'])
+        exp_company = _latex_escape(rec['company'])
+        exp_location = _latex_escape(rec['location'])
+        experience_parts.append(
+            f"\\cventry{{{exp_dates}}}{{{exp_title}}}{{{exp_company}}}"
+            f"{{{exp_location}}}{{}}{{\n")
+        if rec['bullets']:
+            experience_parts.append("\\begin{itemize}\n")
+            experience_parts.extend(f"\\item {_latex_escape(b)}\n" for b in rec['bullets'])
+            experience_parts.append("\\end{itemize}")
+        experience_parts.append("}\n\n")
+    experience_latex = ''.join(experience_parts)
+
+    # Build formation
+    formation_parts = []
+    for line in sections['formation']:
+        if '|' in line:
+            parts = _PIPE_SPLIT.split(line.strip())
+            dates = _latex_escape(parts[0]) if len(parts) > 0 else ""
+            diplome = _latex_escape(parts[1]) if len(parts) > 1 else ""
+            ecole = _latex_escape(parts[2]) if len(parts) > 2 else ""
+            detail = _latex_escape(parts[3]) if len(parts) > 3 else ""
+            formation_parts.append(f"\\cventry{{{dates}}}{{{diplome}}}{{{ecole}}}{{}}{{}}{{{detail}}}\n")
+    formation_latex = ''.join(formation_parts)
+
+    # Build profil
+    profil_text = ' '.join([_latex_escape(p) for p in sections['profil']])
+
+    # Build interets
+    interets_text = ', '.join([_latex_escape(i) for i in sections['interets']])
+
+    # Generate full LaTeX document
+    latex = f'''\\documentclass[a4paper,11pt]{{moderncv}}
 \\moderncvstyle[symbols]{{classic}}
 \\moderncvcolor{{blue}}
 \\usepackage[scale=0.95]{{geometry}}
@@ -1004,415 +1889,501 @@ NE PAS INVENTER d'expériences, mais reformuler honnêtement celles existantes p
 
 \\end{{document}}
 '''
-        return latex
-
-    def _format_cventry(self, entry, bullets):
-        """Format a cventry with bullet points."""
-        bullets_latex = ""
-        if bullets:
-            bullets_latex = "\\begin{itemize}\n"
-            for b in bullets:
-                bullets_latex += f"\\item {b}\n"
-            bullets_latex += "\\end{itemize}"
-
-        return f"""\\cventry{{{entry['dates']}}}{{{entry['title']}}}{{{entry['company']}}}{{{entry['location']}}}{{}}{{
-{bullets_latex}}}
-
-"""
-
-    def _compile_latex(self, latex_code):
-        """Compile LaTeX to PDF using pdflatex."""
-        import shutil
-
-        # Create temp directory
-        temp_dir = tempfile.mkdtemp()
-        tex_file = os.path.join(temp_dir, "cv.tex")
-        pdf_file = os.path.join(temp_dir, "cv.pdf")
-
+    return latex
+
+
+# Dumped-format cache: loading moderncv and its package/font graph costs
+# pdflatex upwards of a second per run. mylatexformat lets us dump a .fmt
+# with the whole preamble preloaded; compiling against it skips that fixed
+# cost. Formats are keyed by preamble hash, so the common bot flow (same
+# CV re-targeted at many job offers) hits the same format every time.
+_LATEX_FMT_DIR = os.environ.get(
+    "LATEX_FMT_DIR", os.path.join(tempfile.gettempdir(), "cv-latex-fmt"))
+
+# Persistent scratch space: per-request nonce dirs live under one base, and
+# TEXMFVAR points at a shared cache so font/map files built by the first
+# compile are reused by every later one instead of regenerated per request.
+_LATEX_WORK_DIR = os.path.join(tempfile.gettempdir(), "cv-latex-work")
+_LATEX_ENV = {**os.environ, "TEXMFVAR": os.path.join(_LATEX_WORK_DIR, "texmf-var")}
+
+
+def _latex_format_args(latex_code):
+    """Return pdflatex args selecting a precompiled format for this preamble.
+
+    Builds the format on first sight of a given preamble; returns [] when
+    the preamble can't be isolated or the dump fails (plain compile then)."""
+    head, sep, _ = latex_code.partition('\\begin{document}')
+    if not sep:
+        return []
+    jobname = f"cv-{hashlib.sha256(head.encode()).hexdigest()[:16]}"
+    fmt_base = os.path.join(_LATEX_FMT_DIR, jobname)
+    if not os.path.exists(f"{fmt_base}.fmt"):
         try:
-            # Write LaTeX file
-            with open(tex_file, 'w', encoding='utf-8') as f:
+            os.makedirs(_LATEX_FMT_DIR, exist_ok=True)
+            src_file = f"{fmt_base}.tex"
+            with open(src_file, 'w', encoding='utf-8') as f:
                 f.write(latex_code)
+            result = subprocess.run(
+                ['pdftex', '-ini', '-interaction=nonstopmode',
+                 f'-output-directory={_LATEX_FMT_DIR}', f'-jobname={jobname}',
+                 '&pdflatex', 'mylatexformat.ltx', src_file],
+                capture_output=True, text=True, timeout=60, env=_LATEX_ENV
+            )
+            if result.returncode != 0 or not os.path.exists(f"{fmt_base}.fmt"):
+                _log(f"LaTeX format dump failed, compiling without format:\n{result.stdout[-500:]}")
+                return []
+        except (OSError, subprocess.TimeoutExpired) as e:
+            _log(f"LaTeX format dump error: {e}")
+            return []
+    return [f'-fmt={fmt_base}']
 
-            # Compile with pdflatex (run twice for references)
-            for _ in range(2):
-                result = subprocess.run(
-                    ['pdflatex', '-interaction=nonstopmode', '-output-directory', temp_dir, tex_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
 
-            # Check if PDF was created
-            if os.path.exists(pdf_file):
-                with open(pdf_file, 'rb') as f:
-                    return f.read()
-            else:
-                print(f"LaTeX compilation failed. Log:\n{result.stdout}\n{result.stderr}")
-                return None
+def _compile_latex(latex_code):
+    """Compile LaTeX to PDF using pdflatex."""
+    import shutil
 
-        except subprocess.TimeoutExpired:
-            print("LaTeX compilation timeout")
-            return None
-        except Exception as e:
-            print(f"LaTeX compilation error: {e}")
-            return None
-        finally:
-            # Cleanup
-            shutil.rmtree(temp_dir, ignore_errors=True)
-
-    def _generate_pdf_reportlab(self, sections, job_title, company):
-        """Generate professional PDF using reportlab (ModernCV style)."""
-        if not PDF_GENERATOR:
-            raise Exception("reportlab not installed")
-
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import cm, mm
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
-        from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
-        from reportlab.lib.colors import HexColor, Color
-        from reportlab.platypus.flowables import Flowable
-        from io import BytesIO
-
-        # ModernCV Blue color scheme
-        MAIN_COLOR = HexColor('#2E5090')  # ModernCV blue
-        DARK_COLOR = HexColor('#1A1A1A')
-        GRAY_COLOR = HexColor('#666666')
-        LIGHT_GRAY = HexColor('#999999')
-
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=1.2*cm,
-            leftMargin=1.2*cm,
-            topMargin=1.0*cm,
-            bottomMargin=1.0*cm
-        )
+    # Create a per-request nonce dir under the persistent base
+    os.makedirs(_LATEX_ENV["TEXMFVAR"], exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix="job-", dir=_LATEX_WORK_DIR)
+    tex_file = os.path.join(temp_dir, "cv.tex")
+    pdf_file = os.path.join(temp_dir, "cv.pdf")
 
-        styles = getSampleStyleSheet()
-
-        # Custom styles - ModernCV inspired
-        cv_styles = {
-            'Name': ParagraphStyle(
-                name='CVNameStyle',
-                fontSize=24,
-                textColor=DARK_COLOR,
-                spaceAfter=8,
-                alignment=TA_LEFT,
-                fontName='Helvetica-Bold'
-            ),
-            'Title': ParagraphStyle(
-                name='CVTitleStyle',
-                fontSize=14,
-                textColor=MAIN_COLOR,
-                spaceAfter=8,
-                alignment=TA_LEFT,
-                fontName='Helvetica-Oblique'
-            ),
-            'Contact': ParagraphStyle(
-                name='CVContactStyle',
-                fontSize=9,
-                textColor=GRAY_COLOR,
-                spaceAfter=2,
-                alignment=TA_LEFT
-            ),
-            'Section': ParagraphStyle(
-                name='CVSectionStyle',
-                fontSize=12,
-                textColor=MAIN_COLOR,
-                spaceBefore=14,
-                spaceAfter=6,
-                fontName='Helvetica-Bold'
-            ),
-            'EntryTitle': ParagraphStyle(
-                name='CVEntryTitleStyle',
-                fontSize=10,
-                textColor=DARK_COLOR,
-                spaceAfter=1,
-                fontName='Helvetica-Bold'
-            ),
-            'EntryDetails': ParagraphStyle(
-                name='CVEntryDetailsStyle',
-                fontSize=10,
-                textColor=GRAY_COLOR,
-                spaceAfter=2,
-                fontName='Helvetica-Oblique'
-            ),
-            'EntryDate': ParagraphStyle(
-                name='CVEntryDateStyle',
-                fontSize=9,
-                textColor=MAIN_COLOR,
-                alignment=TA_RIGHT,
-                fontName='Helvetica'
-            ),
-            'Body': ParagraphStyle(
-                name='CVBodyStyle',
-                fontSize=10,
-                textColor=DARK_COLOR,
-                spaceAfter=4,
-                leading=13
-            ),
-            'Bullet': ParagraphStyle(
-                name='CVBulletStyle',
-                fontSize=9,
-                textColor=DARK_COLOR,
-                leftIndent=12,
-                spaceAfter=2,
-                leading=12
-            ),
-            'SkillLabel': ParagraphStyle(
-                name='CVSkillLabelStyle',
-                fontSize=10,
-                textColor=MAIN_COLOR,
-                fontName='Helvetica-Bold'
-            ),
-            'SkillValue': ParagraphStyle(
-                name='CVSkillValueStyle',
-                fontSize=10,
-                textColor=DARK_COLOR
-            ),
-        }
+    try:
+        # Write LaTeX file
+        with open(tex_file, 'w', encoding='utf-8') as f:
+            f.write(latex_code)
+
+        # Generated CVs carry no cross-references, so a single pass is
+        # normally enough. If the document does use them, resolve with a
+        # -draftmode first pass (no PDF shipout or font subsetting, a
+        # large share of pdflatex wall time) and only ship on the second.
+        if any(tok in latex_code for tok in ('\\ref', '\\pageref', '\\label')):
+            passes = (['-draftmode'], [])
+        else:
+            passes = ([],)
+
+        # pdflatex logs hundreds of KB we only care about on failure;
+        # spool them to a file instead of buffering into Python strings
+        log_file = os.path.join(temp_dir, "cv.console.log")
+
+        def compile_passes(fmt_args):
+            with open(log_file, 'wb') as logf:
+                for pass_args in passes:
+                    subprocess.run(
+                        ['pdflatex', *fmt_args, *pass_args, '-interaction=nonstopmode',
+                         '-output-directory', temp_dir, tex_file],
+                        stdout=logf,
+                        stderr=subprocess.STDOUT,
+                        timeout=60,
+                        env=_LATEX_ENV
+                    )
+
+        # Compile against the precompiled preamble format when available
+        fmt_args = _latex_format_args(latex_code)
+        compile_passes(fmt_args)
+
+        # A stale or incompatible format shouldn't kill the request -
+        # retry once from scratch without it
+        if fmt_args and not os.path.exists(pdf_file):
+            _log("Compile with precompiled format failed, retrying without it")
+            compile_passes([])
+
+        # Check if PDF was created
+        if os.path.exists(pdf_file):
+            with open(pdf_file, 'rb') as f:
+                return f.read()
+        else:
+            try:
+                with open(log_file, errors='replace') as f:
+                    log_tail = f.read()[-2000:]
+            except OSError:
+                log_tail = "(no log)"
+            _log(f"LaTeX compilation failed. Log:\n{log_tail}")
+            return None
 
-        story = []
-
-        # === HEADER ===
-        name = sections.get('name', 'Candidat') or 'Candidat'
-        title = sections.get('title') or job_title or ''
-
-        # Name
-        story.append(Paragraph(self._escape(name), cv_styles['Name']))
-
-        # Title
-        if title:
-            story.append(Paragraph(self._escape(title), cv_styles['Title']))
-
-        # Horizontal line
-        story.append(HRFlowable(width="100%", thickness=2, color=MAIN_COLOR, spaceAfter=10))
-
-        has_content = False
-
-        # === PROFIL ===
-        profil = sections.get('profil', [])
-        if profil:
-            has_content = True
-            story.append(Paragraph("Profil", cv_styles['Section']))
-            story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
-            profil_text = ' '.join(profil)
-            story.append(Paragraph(self._escape_with_bold(profil_text), cv_styles['Body']))
-
-        # === COMPÉTENCES ===
-        competences = sections.get('competences', [])
-        if competences:
-            has_content = True
-            story.append(Paragraph("Compétences clés", cv_styles['Section']))
-            story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
-
-            # Create a table for skills
-            skill_data = []
-            for line in competences:
-                if '|' in line:
-                    parts = line.split('|', 1)
-                    label = parts[0].strip()
-                    value = parts[1].strip()
-                    skill_data.append([
-                        Paragraph(f"<b>{self._escape(label)}</b>", cv_styles['SkillLabel']),
-                        Paragraph(self._escape(value), cv_styles['SkillValue'])
-                    ])
-                elif ':' in line:
-                    parts = line.split(':', 1)
-                    label = parts[0].strip()
-                    value = parts[1].strip()
-                    skill_data.append([
-                        Paragraph(f"<b>{self._escape(label)}</b>", cv_styles['SkillLabel']),
-                        Paragraph(self._escape(value), cv_styles['SkillValue'])
-                    ])
-
-            if skill_data:
-                skill_table = Table(skill_data, colWidths=[4*cm, 13*cm])
-                skill_table.setStyle(TableStyle([
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ('TOPPADDING', (0, 0), (-1, -1), 2),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-                ]))
-                story.append(skill_table)
-
-        # === EXPÉRIENCE ===
-        experience = sections.get('experience', [])
-        if experience:
-            has_content = True
-            story.append(Paragraph("Expérience professionnelle", cv_styles['Section']))
-            story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
-
-            current_entry = None
-            current_bullets = []
-
-            for line in experience:
-                if '|' in line and not line.startswith('-'):
-                    # Output previous entry
-                    if current_entry:
-                        self._add_experience_entry(story, current_entry, current_bullets, cv_styles)
-                        current_bullets = []
-
-                    parts = [p.strip() for p in line.split('|')]
-                    current_entry = {
-                        'dates': parts[0] if len(parts) > 0 else "",
-                        'title': parts[1] if len(parts) > 1 else "",
-                        'company': parts[2] if len(parts) > 2 else "",
-                        'location': parts[3] if len(parts) > 3 else "",
-                    }
-                elif line.startswith('-') or line.startswith('•'):
-                    bullet = line.lstrip('-•* ').strip()
-                    current_bullets.append(bullet)
-
-            # Output last entry
-            if current_entry:
-                self._add_experience_entry(story, current_entry, current_bullets, cv_styles)
-
-        # === FORMATION ===
-        formation = sections.get('formation', [])
-        if formation:
-            has_content = True
-            story.append(Paragraph("Formation", cv_styles['Section']))
-            story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
-
-            for line in formation:
-                if '|' in line:
-                    parts = [p.strip() for p in line.split('|')]
-                    dates = parts[0] if len(parts) > 0 else ""
-                    diplome = parts[1] if len(parts) > 1 else ""
-                    ecole = parts[2] if len(parts) > 2 else ""
-                    details = parts[3] if len(parts) > 3 else ""
-
-                    # Create entry table
-                    entry_data = [[
-                        Paragraph(f"<b>{self._escape(diplome)}</b>", cv_styles['EntryTitle']),
-                        Paragraph(self._escape(dates), cv_styles['EntryDate'])
-                    ]]
-                    entry_table = Table(entry_data, colWidths=[13*cm, 4*cm])
-                    entry_table.setStyle(TableStyle([
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('TOPPADDING', (0, 0), (-1, -1), 0),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-                    ]))
-                    story.append(entry_table)
-
-                    if ecole:
-                        story.append(Paragraph(self._escape(ecole), cv_styles['EntryDetails']))
-                    if details:
-                        story.append(Paragraph(self._escape(details), cv_styles['Body']))
-                    story.append(Spacer(1, 4))
-
-        # === CENTRES D'INTÉRÊT ===
-        interets = sections.get('interets', [])
-        if interets:
-            has_content = True
-            story.append(Paragraph("Centres d'intérêt", cv_styles['Section']))
-            story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
-            interets_text = ', '.join(interets)
-            story.append(Paragraph(self._escape(interets_text), cv_styles['Body']))
-
-        # Fallback if no content
-        if not has_content:
-            print("Warning: No structured sections found")
-            story.append(Paragraph("Contenu", cv_styles['Section']))
-            story.append(Paragraph("Le CV n'a pas pu être structuré automatiquement.", cv_styles['Body']))
-
-        doc.build(story)
-        pdf_data = buffer.getvalue()
-
-        if len(pdf_data) < 1000:
-            raise Exception("Generated PDF is too small, likely empty")
-
-        return pdf_data
-
-    def _add_experience_entry(self, story, entry, bullets, cv_styles):
-        """Add an experience entry to the story."""
-        from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.units import cm
-
-        # Title + Date row
-        entry_data = [[
-            Paragraph(f"<b>{self._escape(entry['title'])}</b>", cv_styles['EntryTitle']),
-            Paragraph(self._escape(entry['dates']), cv_styles['EntryDate'])
-        ]]
-        entry_table = Table(entry_data, colWidths=[13*cm, 4*cm])
-        entry_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('TOPPADDING', (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        story.append(entry_table)
-
-        # Company + Location
-        company_loc = entry['company']
-        if entry['location']:
-            company_loc += f" — {entry['location']}"
-        if company_loc:
-            story.append(Paragraph(self._escape(company_loc), cv_styles['EntryDetails']))
-
-        # Bullets
-        for bullet in bullets:
-            story.append(Paragraph(f"• {self._escape_with_bold(bullet)}", cv_styles['Bullet']))
-
-        story.append(Spacer(1, 6))
-
-    def _escape(self, text):
-        """Escape HTML special characters."""
-        if not text:
-            return ""
-        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-
-    def _escape_with_bold(self, text):
-        """Escape HTML and convert **bold** markdown to <b> tags for reportlab."""
-        if not text:
-            return ""
-        import re
-        # First escape HTML
-        text = self._escape(text)
-        # Then convert **bold** to <b>bold</b> (after escaping, so tags won't be escaped)
-        text = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', text)
+    except subprocess.TimeoutExpired:
+        _log("LaTeX compilation timeout")
+        return None
+    except Exception as e:
+        _log(f"LaTeX compilation error: {e}")
+        return None
+    finally:
+        # Cleanup
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+# ModernCV blue - shared by the cached style sheet and the section rules
+_CV_MAIN_COLOR = HexColor('#2E5090') if PDF_GENERATOR else None
+
+
+@functools.lru_cache(maxsize=1)
+def _cv_styles():
+    """ModernCV-inspired paragraph styles, built once per process.
+
+    The styles are read-only during rendering, so sharing one set across
+    requests is safe and skips the per-call construction cost."""
+    MAIN_COLOR = _CV_MAIN_COLOR
+    DARK_COLOR = HexColor('#1A1A1A')
+    GRAY_COLOR = HexColor('#666666')
+
+    return {
+        'Name': ParagraphStyle(
+            name='CVNameStyle',
+            fontSize=24,
+            textColor=DARK_COLOR,
+            spaceAfter=8,
+            alignment=TA_LEFT,
+            fontName='Helvetica-Bold'
+        ),
+        'Title': ParagraphStyle(
+            name='CVTitleStyle',
+            fontSize=14,
+            textColor=MAIN_COLOR,
+            spaceAfter=8,
+            alignment=TA_LEFT,
+            fontName='Helvetica-Oblique'
+        ),
+        'Contact': ParagraphStyle(
+            name='CVContactStyle',
+            fontSize=9,
+            textColor=GRAY_COLOR,
+            spaceAfter=2,
+            alignment=TA_LEFT
+        ),
+        'Section': ParagraphStyle(
+            name='CVSectionStyle',
+            fontSize=12,
+            textColor=MAIN_COLOR,
+            spaceBefore=14,
+            spaceAfter=6,
+            fontName='Helvetica-Bold'
+        ),
+        'EntryTitle': ParagraphStyle(
+            name='CVEntryTitleStyle',
+            fontSize=10,
+            textColor=DARK_COLOR,
+            spaceAfter=1,
+            fontName='Helvetica-Bold'
+        ),
+        'EntryDetails': ParagraphStyle(
+            name='CVEntryDetailsStyle',
+            fontSize=10,
+            textColor=GRAY_COLOR,
+            spaceAfter=2,
+            fontName='Helvetica-Oblique'
+        ),
+        'EntryDate': ParagraphStyle(
+            name='CVEntryDateStyle',
+            fontSize=9,
+            textColor=MAIN_COLOR,
+            alignment=TA_RIGHT,
+            fontName='Helvetica'
+        ),
+        'Body': ParagraphStyle(
+            name='CVBodyStyle',
+            fontSize=10,
+            textColor=DARK_COLOR,
+            spaceAfter=4,
+            leading=13
+        ),
+        'Bullet': ParagraphStyle(
+            name='CVBulletStyle',
+            fontSize=9,
+            textColor=DARK_COLOR,
+            leftIndent=12,
+            spaceAfter=2,
+            leading=12
+        ),
+        'SkillLabel': ParagraphStyle(
+            name='CVSkillLabelStyle',
+            fontSize=10,
+            textColor=MAIN_COLOR,
+            fontName='Helvetica-Bold'
+        ),
+        'SkillValue': ParagraphStyle(
+            name='CVSkillValueStyle',
+            fontSize=10,
+            textColor=DARK_COLOR
+        ),
+    }
+
+
+def _make_doc(buf):
+    """A4 CV document template over the given buffer (fixed page geometry)."""
+    return SimpleDocTemplate(
+        buf,
+        pagesize=A4,
+        rightMargin=1.2 * cm,
+        leftMargin=1.2 * cm,
+        topMargin=1.0 * cm,
+        bottomMargin=1.0 * cm
+    )
+
+
+def _generate_pdf_reportlab(sections, job_title, company):
+    """Generate professional PDF using reportlab (ModernCV style)."""
+    if not PDF_GENERATOR:
+        raise Exception("reportlab not installed")
+
+    MAIN_COLOR = _CV_MAIN_COLOR
+
+    # Reuse one growable buffer per worker thread instead of allocating a
+    # fresh BytesIO (and regrowing it to PDF size) on every render
+    buffer = getattr(_TLS, "pdf_buf", None)
+    if buffer is None:
+        buffer = _TLS.pdf_buf = BytesIO()
+    buffer.seek(0)
+    buffer.truncate()
+    doc = _make_doc(buffer)
+
+    cv_styles = _cv_styles()
+
+    story = []
+
+    # === HEADER ===
+    name = sections.get('name', 'Candidat') or 'Candidat'
+    title = sections.get('title') or job_title or ''
+
+    # Name
+    story.append(Paragraph(_escape(name), cv_styles['Name']))
+
+    # Title
+    if title:
+        story.append(Paragraph(_escape(title), cv_styles['Title']))
+
+    # Horizontal line
+    story.append(HRFlowable(width="100%", thickness=2, color=MAIN_COLOR, spaceAfter=10))
+
+    has_content = False
+
+    # === PROFIL ===
+    profil = sections.get('profil', [])
+    if profil:
+        has_content = True
+        story.append(Paragraph("Profil", cv_styles['Section']))
+        story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
+        profil_text = ' '.join(profil)
+        story.append(Paragraph(_escape_with_bold(profil_text), cv_styles['Body']))
+
+    # === COMPÉTENCES ===
+    competences = sections.get('competences', [])
+    if competences:
+        has_content = True
+        story.append(Paragraph("Compétences clés", cv_styles['Section']))
+        story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
+
+        # Create a table for skills
+        skill_data = []
+        for line in competences:
+            if '|' in line:
+                parts = _PIPE_SPLIT.split(line.strip(), maxsplit=1)
+                label = parts[0]
+                value = parts[1]
+                skill_data.append([
+                    Paragraph(f"<b>{_escape(label)}</b>", cv_styles['SkillLabel']),
+                    Paragraph(_escape(value), cv_styles['SkillValue'])
+                ])
+            elif ':' in line:
+                parts = line.split(':', 1)
+                label = parts[0].strip()
+                value = parts[1].strip()
+                skill_data.append([
+                    Paragraph(f"<b>{_escape(label)}</b>", cv_styles['SkillLabel']),
+                    Paragraph(_escape(value), cv_styles['SkillValue'])
+                ])
+
+        if skill_data:
+            skill_table = Table(skill_data, colWidths=_SKILL_COLWIDTHS)
+            skill_table.setStyle(_SKILL_TABLE_STYLE)
+            story.append(skill_table)
+
+    # === EXPÉRIENCE ===
+    experience = sections.get('experience', [])
+    if experience:
+        has_content = True
+        story.append(Paragraph("Expérience professionnelle", cv_styles['Section']))
+        story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
+
+        for rec in _experience_records(experience):
+            _add_experience_entry(story, rec, rec['bullets'], cv_styles)
+
+    # === FORMATION ===
+    formation = sections.get('formation', [])
+    if formation:
+        has_content = True
+        story.append(Paragraph("Formation", cv_styles['Section']))
+        story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
+
+        for line in formation:
+            if '|' in line:
+                parts = _PIPE_SPLIT.split(line.strip())
+                dates = parts[0] if len(parts) > 0 else ""
+                diplome = parts[1] if len(parts) > 1 else ""
+                ecole = parts[2] if len(parts) > 2 else ""
+                details = parts[3] if len(parts) > 3 else ""
+
+                # Create entry table
+                entry_data = [[
+                    Paragraph(f"<b>{_escape(diplome)}</b>", cv_styles['EntryTitle']),
+                    Paragraph(_escape(dates), cv_styles['EntryDate'])
+                ]]
+                entry_table = Table(entry_data, colWidths=_ENTRY_COLWIDTHS)
+                entry_table.setStyle(_ENTRY_TABLE_STYLE)
+                story.append(entry_table)
+
+                if ecole:
+                    story.append(Paragraph(_escape(ecole), cv_styles['EntryDetails']))
+                if details:
+                    story.append(Paragraph(_escape(details), cv_styles['Body']))
+                story.append(Spacer(1, 4))
+
+    # === CENTRES D'INTÉRÊT ===
+    interets = sections.get('interets', [])
+    if interets:
+        has_content = True
+        story.append(Paragraph("Centres d'intérêt", cv_styles['Section']))
+        story.append(HRFlowable(width="100%", thickness=0.5, color=MAIN_COLOR, spaceAfter=6))
+        interets_text = ', '.join(interets)
+        story.append(Paragraph(_escape(interets_text), cv_styles['Body']))
+
+    # Fallback if no content
+    if not has_content:
+        _log("Warning: No structured sections found")
+        story.append(Paragraph("Contenu", cv_styles['Section']))
+        story.append(Paragraph("Le CV n'a pas pu être structuré automatiquement.", cv_styles['Body']))
+
+    doc.build(story)
+
+    # Validate size from the cursor position before materializing the
+    # bytes - getvalue() copies the whole buffer, so only do it on success
+    if buffer.tell() < 1000:
+        raise Exception("Generated PDF is too small, likely empty")
+
+    return buffer.getvalue()
+
+
+def _add_experience_entry(story, entry, bullets, cv_styles):
+    """Add an experience entry to the story."""
+    # Title + Date row
+    entry_data = [[
+        Paragraph(f"<b>{_escape(entry['title'])}</b>", cv_styles['EntryTitle']),
+        Paragraph(_escape(entry['dates']), cv_styles['EntryDate'])
+    ]]
+    entry_table = Table(entry_data, colWidths=_ENTRY_COLWIDTHS)
+    entry_table.setStyle(_ENTRY_TABLE_STYLE)
+    story.append(entry_table)
+
+    # Company + Location
+    company_loc = entry['company']
+    if entry['location']:
+        company_loc += f" — {entry['location']}"
+    if company_loc:
+        story.append(Paragraph(_escape(company_loc), cv_styles['EntryDetails']))
+
+    # Bullets
+    for bullet in bullets:
+        story.append(Paragraph(f"• {_escape_with_bold(bullet)}", cv_styles['Bullet']))
+
+    story.append(Spacer(1, 6))
+
+
+@functools.lru_cache(maxsize=2048)
+def _escape(text):
+    """Escape HTML special characters (single C-level pass, memoized)."""
+    if not text:
+        return ""
+    if not _HTML_SPECIALS_RE.search(text):
         return text
+    return _html_escape(text, quote=False)
+
 
-    def extract_json(self, response: str) -> dict:
-        """Extract JSON from Claude's response."""
-        response = response.strip()
+def _escape_with_bold(text):
+    """Escape HTML and convert **bold** markdown to <b> tags for reportlab."""
+    if not text:
+        return ""
+    if not _HTML_SPECIALS_RE.search(text):
+        return text
+    # One scan: _BOLD_RE.split alternates plain fragments (even indexes)
+    # with bold bodies (odd), each escaped before the tags are added
+    parts = _BOLD_RE.split(text)
+    return ''.join(
+        _html_escape(part, quote=False) if i % 2 == 0
+        else f'<b>{_html_escape(part, quote=False)}</b>'
+        for i, part in enumerate(parts)
+    )
+
+
+_JSON_BLOCK_RE = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+def _first_json_object(s: str):
+    """Return the first balanced {...} in s, honoring strings and escapes.
+
+    One left-to-right pass instead of a find/rfind pair that rescans the
+    whole tail of multi-KB responses."""
+    depth = 0
+    start = -1
+    in_str = False
+    esc = False
+    for i, c in enumerate(s):
+        if in_str:
+            if esc:
+                esc = False
+            elif c == '\\':
+                esc = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
+
+
+def _loads(text):
+    """Parse JSON with orjson when available (C parser), stdlib otherwise."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def extract_json(response: str) -> dict:
+    """Extract JSON from Claude's response."""
+    response = response.strip()
+
+    # Try direct parse
+    try:
+        return _loads(response)
+    except ValueError:
+        pass
 
-        # Try direct parse
+    # Find JSON in markdown code block
+    m = _JSON_BLOCK_RE.search(response)
+    if m:
         try:
-            return json.loads(response)
-        except json.JSONDecodeError:
+            return _loads(m.group(1))
+        except ValueError:
             pass
 
-        # Find JSON in markdown code block
-        if "```json" in response:
-            start = response.find("```json") + 7
-            end = response.find("```", start)
-            if end > start:
-                try:
-                    return json.loads(response[start:end].strip())
-                except json.JSONDecodeError:
-                    pass
-
-        # Find any JSON object
-        start = response.find("{")
-        end = response.rfind("}") + 1
-        if start >= 0 and end > start:
-            try:
-                return json.loads(response[start:end])
-            except json.JSONDecodeError:
-                pass
-
-        # Return raw response wrapped
-        return {"raw_response": response}
+    # Find the first balanced JSON object
+    candidate = _first_json_object(response)
+    if candidate:
+        try:
+            return _loads(candidate)
+        except ValueError:
+            pass
 
-    def log_message(self, format, *args):
-        print(f"[{self.log_date_time_string()}] {format % args}")
+    # Return raw response wrapped
+    return {"raw_response": response}
 
 
 def main():
-    server = ThreadingHTTPServer(("0.0.0.0", PORT), ClaudeHandler)
     print(f"🚀 Claude HTTP Server running on port {PORT}")
     print(f"📄 PDF Extractor: {PDF_EXTRACTOR or 'None (install pdfplumber)'}")
     print(f"📄 PDF Generator: {PDF_GENERATOR or 'None (install reportlab)'}")
@@ -1426,11 +2397,10 @@ def main():
     print(f"  POST /extract-pdf      - PDF text extraction")
     print(f"  POST /generate-pdf     - PDF generation from CV content")
 
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        print("\nShutting down...")
-        server.shutdown()
+    uvicorn.run(app, host="0.0.0.0", port=PORT,
+                loop="uvloop" if uvloop is not None else "auto",
+                http=HTTP_IMPL,
+                timeout_keep_alive=KEEP_ALIVE_TIMEOUT)
 
 
 if __name__ == "__main__":